@@ -0,0 +1,4 @@
+"""Performance benchmarks for CodeSage.
+
+Run ``python -m benchmarks.run --help`` from the repository root.
+"""
@@ -0,0 +1,94 @@
+"""Synthetic Python corpora for benchmarking.
+
+Every shape is generated from a seeded RNG, so the same arguments always
+produce byte-identical files and timings stay comparable between runs.
+"""
+import os
+import random
+
+SHAPES = ('many_small', 'giant', 'deep_nesting', 'long_lines')
+
+# Per shape: (number of files, functions per file) at scale 1.
+SHAPE_SIZES = {
+    'many_small': (200, 5),
+    'giant': (2, 1500),
+    'deep_nesting': (20, 20),
+    'long_lines': (20, 50),
+}
+
+
+def _function(rng, name, statements, line_width=60):
+    lines = [f"def {name}(items, limit={rng.randint(1, 9)}):",
+             f'    """Synthetic function {name}."""',
+             "    total = 0"]
+    for i in range(statements):
+        kind = rng.random()
+        if kind < 0.3:
+            lines.append(f"    if total > {rng.randint(0, 100)}:")
+            lines.append(f"        total -= {rng.randint(1, 5)}")
+        elif kind < 0.5:
+            lines.append("    for item in items:")
+            lines.append("        total += item")
+        elif kind < 0.6:
+            lines.append("    CamelValue = [x for x in items if x]")
+        else:
+            padding = 'value_' * max(1, (line_width - 20) // 6)
+            lines.append(f"    {padding}{i} = total + {i}")
+    lines.append("    return total")
+    return lines
+
+
+def _nested_function(rng, name, depth):
+    lines = [f"def {name}(values):"]
+    indent = "    "
+    for level in range(depth):
+        if level % 3 == 0:
+            lines.append(f"{indent}def inner_{level}(values):")
+        elif level % 3 == 1:
+            lines.append(f"{indent}for value_{level} in values:")
+        else:
+            lines.append(f"{indent}if values:")
+        indent += "    "
+        lines.append(f"{indent}BadName{level} = {rng.randint(0, 9)}")
+    lines.append(f"{indent}pass")
+    lines.append("    return values")
+    return lines
+
+
+def generate_source(shape, functions, rng):
+    lines = ['"""Generated benchmark module."""', "import os", "from math import *", ""]
+    for index in range(functions):
+        name = f"function_{index}" if index % 7 else f"BadFunction{index}"
+        if shape == 'deep_nesting':
+            body = _nested_function(rng, name, depth=rng.randint(10, 30))
+        elif shape == 'long_lines':
+            body = _function(rng, name, rng.randint(5, 15), line_width=rng.randint(120, 400))
+        else:
+            body = _function(rng, name, rng.randint(3, 30))
+        lines.extend(body)
+        lines.append("")
+        if index % 25 == 0:
+            lines.append(f"class generated_{index}:")
+            lines.append("    attribute = 1")
+            lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def generate_corpus(directory, shape, scale=1.0, seed=0):
+    """Write a corpus of ``shape`` into ``directory``; return its file paths."""
+    if shape not in SHAPE_SIZES:
+        raise ValueError(f"Unknown corpus shape {shape!r}; expected one of {', '.join(SHAPES)}")
+    files, functions = SHAPE_SIZES[shape]
+    if shape == 'giant':
+        functions = max(1, int(functions * scale))
+    else:
+        files = max(1, int(files * scale))
+    rng = random.Random(f"{shape}:{seed}")
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(files):
+        path = os.path.join(directory, f"{shape}_{index:04d}.py")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_source(shape, functions, rng))
+        paths.append(path)
+    return paths
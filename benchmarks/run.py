@@ -0,0 +1,188 @@
+"""Benchmark runner with a JSON history and a regression gate.
+
+Examples, from the repository root::
+
+    python -m benchmarks.run                    # run and print timings
+    python -m benchmarks.run --record           # also append them to the history
+    python -m benchmarks.run --check            # exit 1 if throughput regressed
+
+Each benchmark reports the best of ``--repeat`` runs as seconds and as
+lines of source per second. ``--check`` compares lines per second against
+the median of the last ``--window`` recorded runs at the same scale.
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.main import CodeSage
+from src.enhanced_analysis import EnhancedCodeSage
+from src.rules import RuleEngine, McCabeComplexityRule
+from src.profiling import Profile
+from src.parallel_processing import analyze_files_parallel
+from src.improved_reporting import generate_detailed_report
+from benchmarks.corpus import SHAPES, generate_corpus
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.json')
+
+
+def _best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmarks(shapes, scale=1.0, repeat=3, processes=None, config=None):
+    """Time every check and the main entry points on synthetic corpora."""
+    config = config or {}
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for shape in shapes:
+            paths = generate_corpus(os.path.join(tmp, shape), shape, scale)
+            sources = []
+            for path in paths:
+                with open(path, 'r', encoding='utf-8') as f:
+                    sources.append(f.read())
+            trees = [ast.parse(source) for source in sources]
+            lines = sum(source.count('\n') for source in sources)
+
+            def record(name, seconds):
+                results[f"{shape}/{name}"] = {
+                    "seconds": seconds,
+                    "lines_per_second": lines / seconds if seconds else float('inf'),
+                }
+
+            # Rules run fused, as the analyzers run them, and the Profile
+            # times only each rule's own visits and source checks, so the
+            # shared tree walk is not charged to every rule. McCabe gets an
+            # engine of its own as it shares the 'complexity' name.
+            engines = [RuleEngine(EnhancedCodeSage(config).build_rules()),
+                       RuleEngine([McCabeComplexityRule(config)])]
+            best = {}
+            for _ in range(repeat):
+                for engine in engines:
+                    profile = Profile()
+                    for tree, source in zip(trees, sources):
+                        engine.run(tree, source, profile=profile)
+                    for rule in engine.rules:
+                        name = f"rule/{type(rule).__name__}"
+                        seconds = profile.rules[rule.name][0]
+                        best[name] = min(best.get(name, seconds), seconds)
+            for name, seconds in best.items():
+                record(name, seconds)
+            record("RuleEngine.run",
+                   _best_of(lambda: [engines[0].run(tree, source) for tree, source in zip(trees, sources)],
+                            repeat))
+
+            sage = CodeSage(config)
+            record("CodeSage.analyze_file",
+                   _best_of(lambda: [sage.analyze_file(path) for path in paths], repeat))
+            enhanced = EnhancedCodeSage(config)
+            record("EnhancedCodeSage.analyze_file",
+                   _best_of(lambda: [enhanced.analyze_file(path) for path in paths], repeat))
+            record("analyze_files_parallel",
+                   _best_of(lambda: analyze_files_parallel(paths, config, processes), repeat))
+
+            file_results = {path: enhanced.analyze_file(path) for path in paths}
+            record("generate_detailed_report",
+                   _best_of(lambda: generate_detailed_report(file_results), repeat))
+    return results
+
+
+def _current_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def load_history(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_history(path, history):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def find_regressions(results, history, scale, threshold=0.1, window=5):
+    """Return ``(name, current, baseline)`` for every benchmark whose
+    throughput dropped more than ``threshold`` below its recent median."""
+    previous = [run for run in history if run.get('scale') == scale][-window:]
+    regressions = []
+    for name, result in sorted(results.items()):
+        past = [run['results'][name]['lines_per_second'] for run in previous
+                if name in run['results']]
+        if not past:
+            continue
+        baseline = statistics.median(past)
+        if result['lines_per_second'] < baseline * (1 - threshold):
+            regressions.append((name, result['lines_per_second'], baseline))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CodeSage performance benchmarks")
+    parser.add_argument('--shape', action='append', choices=SHAPES,
+                        help="Corpus shape to benchmark (repeatable, default: all)")
+    parser.add_argument('--scale', type=float, default=1.0, help="Corpus size multiplier")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark; the best is kept")
+    parser.add_argument('--processes', type=int, help="Worker processes for analyze_files_parallel")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="Path of the JSON history file")
+    parser.add_argument('--record', action='store_true', help="Append this run to the history")
+    parser.add_argument('--check', action='store_true',
+                        help="Exit with status 1 if throughput regressed against the history")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="Allowed throughput drop for --check, as a fraction (default 0.1)")
+    parser.add_argument('--window', type=int, default=5,
+                        help="Number of recent runs the --check baseline is taken from")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.shape or SHAPES, args.scale, args.repeat, args.processes)
+    history = load_history(args.history)
+
+    for name, result in sorted(results.items()):
+        print(f"{name:55} {result['seconds'] * 1000:10.1f} ms {result['lines_per_second']:14,.0f} lines/s")
+
+    regressions = find_regressions(results, history, args.scale, args.threshold, args.window) if args.check else []
+
+    if args.record:
+        history.append({
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            "commit": _current_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "results": results,
+        })
+        save_history(args.history, history)
+
+    if regressions:
+        print()
+        print(f"Throughput regressions beyond {args.threshold:.0%}:")
+        for name, current, baseline in regressions:
+            print(f"- {name}: {current:,.0f} lines/s (baseline {baseline:,.0f} lines/s)")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
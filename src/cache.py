@@ -0,0 +1,192 @@
+"""Persistent on-disk cache of per-file analysis results.
+
+Entries are keyed by the SHA-256 of the file content together with a
+namespace (CodeSage version and config fingerprint), so a cached result is
+only reused when neither the file nor the rules that produced it changed.
+Each entry is a small JSON file written to a temporary name and atomically
+renamed into place, which keeps concurrent writers from ever exposing a
+partial entry.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from .source_reader import open_source
+except ImportError:
+    from source_reader import open_source
+
+# Bumped whenever the layout of stored entries changes.
+CACHE_FORMAT = b'2'
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60
+DEFAULT_MEMORY_ENTRIES = 10000
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+
+
+class ResultCache:
+    def __init__(self, directory, namespace='', max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.directory = directory
+        self.namespace = namespace.encode('utf-8')
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def key(self, content):
+        """Return the cache key for ``content`` (bytes) in this namespace."""
+        digest = hashlib.sha256(CACHE_FORMAT)
+        digest.update(b'\0')
+        digest.update(self.namespace)
+        digest.update(b'\0')
+        digest.update(content)
+        return digest.hexdigest()
+
+    def key_for_file(self, file_path):
+        with open_source(file_path) as data:
+            return self.key(data)
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                issues = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return issues
+
+    def put(self, key, issues):
+        path = self._entry_path(key)
+        entry_dir = os.path.dirname(path)
+        os.makedirs(entry_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(issues, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.writes += 1
+
+    def prune(self):
+        """Evict entries older than ``max_age``, then the least recently
+        used ones until the cache fits in ``max_bytes``."""
+        now = time.time()
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                is_stale_tmp = name.endswith('.tmp') and now - stat.st_mtime > 3600
+                if is_stale_tmp or (self.max_age is not None and now - stat.st_mtime > self.max_age):
+                    _remove(path)
+                    continue
+                if name.endswith('.json'):
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+        if self.max_bytes is not None and total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                _remove(path)
+                total -= size
+
+
+class WarmCache:
+    """In-memory LRU of cache records in front of an optional ResultCache.
+
+    Offers the ``get``/``put`` interface of a cache backend and holds at
+    most ``max_entries`` records, together no larger than ``max_bytes``
+    when written as JSON, dropping the least recently used; entries found
+    on disk are promoted into memory. Safe to share between threads.
+    """
+
+    def __init__(self, disk=None, use_disk=True, max_entries=DEFAULT_MEMORY_ENTRIES,
+                 max_bytes=DEFAULT_MEMORY_BYTES):
+        self.disk = disk
+        self.use_disk = use_disk and disk is not None
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (records, size in bytes)
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, records, size):
+        # Called with the lock held
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        self._entries[key] = (records, size)
+        self.bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, dropped) = self._entries.popitem(last=False)
+            self.bytes -= dropped
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        # The disk is read without holding up other threads
+        records = self.disk.get(key) if self.use_disk else None
+        size = None if records is None else _json_size(records)
+        with self._lock:
+            if records is None:
+                self.misses += 1
+                return None
+            self._remember(key, records, size)
+            self.hits += 1
+        return records
+
+    def put(self, key, records):
+        size = _json_size(records)
+        with self._lock:
+            self._remember(key, records, size)
+        if self.use_disk:
+            self.disk.put(key, records)
+            with self._lock:
+                self.writes += 1
+
+
+def _json_size(records):
+    return len(json.dumps(records).encode('utf-8'))
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,100 @@
+"""Thin command-line client for the CodeSage daemon.
+
+Forwards paths to a running ``daemon.py`` over its Unix socket and prints
+what comes back, so a call costs little more than interpreter startup.
+Only the standard library is imported here; the analyzers, their
+dependencies and the cache all live in the daemon.
+
+    python src/daemon.py &
+    python src/client.py path/to/project -f json
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+
+def default_socket_path():
+    """Per-user socket path, overridable with ``CODESAGE_SOCKET``."""
+    path = os.environ.get('CODESAGE_SOCKET')
+    if path:
+        return path
+    user = os.getuid() if hasattr(os, 'getuid') else os.environ.get('USERNAME', 'user')
+    return os.path.join(tempfile.gettempdir(), f"codesage-{user}.sock")
+
+
+class DaemonError(RuntimeError):
+    """The daemon answered with nothing, or with something that is not a response."""
+
+
+def send_request(request, socket_path=None, timeout=None):
+    """Send one request to the daemon and return its decoded response.
+
+    Raises OSError if the daemon cannot be reached and DaemonError if its
+    reply is empty or malformed.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    reply = b''.join(chunks)
+    if not reply:
+        raise DaemonError("the daemon closed the connection without answering")
+    try:
+        response = json.loads(reply)
+    except ValueError as e:
+        raise DaemonError(f"malformed reply from the daemon: {e}") from None
+    if not isinstance(response, dict):
+        raise DaemonError("malformed reply from the daemon: expected a JSON object")
+    return response
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CodeSage client for a running daemon")
+    parser.add_argument('paths', nargs='*', help="Files or directories to analyze")
+    parser.add_argument('-c', '--config', default='config.yaml', help="Path to the configuration file")
+    parser.add_argument('-f', '--format', choices=['text', 'json'], default='text', help="Output format")
+    parser.add_argument('--socket', help="Daemon socket path")
+    parser.add_argument('--status', action='store_true', help="Print the daemon's cache statistics")
+    parser.add_argument('--stop', action='store_true', help="Stop the daemon")
+    args = parser.parse_args(argv)
+
+    if args.stop:
+        request = {"command": "shutdown"}
+    elif args.status:
+        request = {"command": "status"}
+    elif args.paths:
+        request = {"command": "analyze", "paths": args.paths, "cwd": os.getcwd(),
+                   "config": os.path.abspath(args.config), "format": args.format}
+    else:
+        parser.error("give at least one path, --status or --stop")
+
+    try:
+        response = send_request(request, args.socket)
+    except OSError as e:
+        print(f"Could not reach the CodeSage daemon ({e}); start it with: python src/daemon.py",
+              file=sys.stderr)
+        return 2
+    except DaemonError as e:
+        print(f"CodeSage daemon error: {e}", file=sys.stderr)
+        return 2
+    if 'error' in response:
+        print(f"Error: {response['error']}", file=sys.stderr)
+        return 1
+    output = response.get('output')
+    if output:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""Parsed, validated and immutable analyzer configuration.
+
+A ``Config`` reads like the dict ``yaml.safe_load`` used to return, so
+rules keep calling ``config.get(...)``, but it cannot change after it is
+built and it carries the fingerprint cache keys are derived from. Loading
+the same unchanged file again returns the same object without parsing
+the YAML a second time.
+
+``ConfigResolver`` layers the ``config.yaml`` and ``pyproject.toml``
+(``[tool.codesage]``) files found in nested directories on top of a base
+config, resolving each directory once.
+"""
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+
+# Known keys and the types their values must have. Other keys are kept
+# as they are.
+SCHEMA = {
+    'max_function_length': int,
+    'max_complexity': int,
+    'max_line_length': int,
+    'min_test_coverage': (int, float),
+    'check_variable_naming': bool,
+    'check_import_style': bool,
+    'check_docstrings': bool,
+    'respect_gitignore': bool,
+    'exclude': (list, tuple),
+    'line_length_tab_size': (int, type(None)),
+    'line_length_east_asian_width': bool,
+}
+
+
+class ConfigError(ValueError):
+    """A config file that cannot be parsed or has values of the wrong type."""
+
+
+def fingerprint(values):
+    """Stable hash of a config mapping, used to key cached results."""
+    encoded = json.dumps(values, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _types(expected):
+    return expected if isinstance(expected, tuple) else (expected,)
+
+
+def _freeze(value):
+    if isinstance(value, Mapping):
+        return Config(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, Config):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class Config(Mapping):
+    __slots__ = ('_values', 'fingerprint', 'source')
+
+    def __init__(self, values=None, source=None):
+        values = {} if values is None else values
+        if not isinstance(values, Mapping):
+            raise ConfigError(f"{source or 'config'}: expected a mapping, got {type(values).__name__}")
+        for key, expected in SCHEMA.items():
+            if key not in values:
+                continue
+            value = values[key]
+            # bool is an int subclass, but True is not a valid number here
+            if not isinstance(value, expected) or (
+                    isinstance(value, bool) and bool not in _types(expected)):
+                raise ConfigError(f"{source or 'config'}: '{key}' has an invalid value {value!r}")
+        self._values = {key: _freeze(value) for key, value in values.items()}
+        self.fingerprint = fingerprint(self.to_dict())
+        self.source = source
+
+    @classmethod
+    def load(cls, path):
+        """Parse and validate a YAML config file; an empty file is an empty config."""
+        import yaml
+
+        with open(path, 'r') as f:
+            try:
+                values = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ConfigError(f"{path}: {e}") from None
+        return cls(values, source=path)
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, Config):
+            return self.fingerprint == other.fingerprint
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return hash(self.fingerprint)
+
+    def __repr__(self):
+        return f"Config({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return (type(self), (self.to_dict(), self.source))
+
+    def to_dict(self):
+        """A plain, mutable copy of the values."""
+        return {key: _thaw(value) for key, value in self._values.items()}
+
+    def merged(self, overrides, source=None):
+        """A new Config with ``overrides`` replacing this one's values."""
+        values = self.to_dict()
+        values.update(overrides)
+        return Config(values, source=source or self.source)
+
+
+# path -> ((mtime_ns, size), parsed contents)
+_loaded = {}
+
+
+def _load_cached(path, parse):
+    """``parse(path)``, reusing the last result while the file is unchanged."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    value = parse(path)
+    _loaded[path] = (signature, value)
+    return value
+
+
+def load_config(path):
+    """``Config.load(path)``, reusing the last result while the file is unchanged."""
+    return _load_cached(path, Config.load)
+
+
+def _load_pyproject(path):
+    """The ``[tool.codesage]`` table of a pyproject.toml, or None."""
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            # No TOML parser before Python 3.11 without tomli
+            return None
+    with open(path, 'rb') as f:
+        try:
+            data = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise ConfigError(f"{path}: {e}") from None
+    table = data.get('tool', {}).get('codesage')
+    if table is None:
+        return None
+    return Config(table, source=path)
+
+
+CONFIG_FILES = (('pyproject.toml', _load_pyproject), ('config.yaml', Config.load))
+
+
+def directory_overrides(directory):
+    """Values set by the config files in ``directory`` itself.
+
+    ``config.yaml`` wins over ``pyproject.toml`` where both set a key.
+    Returns ``(values, source)``; ``values`` is empty if there are none.
+    """
+    values = {}
+    source = None
+    for name, parse in CONFIG_FILES:
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+        config = _load_cached(path, parse)
+        if config:
+            values.update(config.to_dict())
+            source = path
+    return values, source
+
+
+class ConfigResolver:
+    """The effective config of each directory.
+
+    A directory's config is its parent's with the directory's own config
+    files applied on top. Lookups go up to the project top: the directory
+    of ``base``'s own file or the nearest one holding ``.git``, whichever
+    comes first, or ``root`` when there is neither above it. ``base``
+    stands in for the top itself when it was loaded from a file, so a
+    config given explicitly is not overridden by the files beside it or
+    at the repository root; only directories below the top apply their
+    own files. So a file gets the same config whether ``root`` names it,
+    its directory or the whole project. Each directory is resolved once,
+    however many files it holds, and configs with the same values are the
+    same object, so analyzers can be shared per ``fingerprint``.
+
+    Nested files only change rule settings; ``exclude`` and
+    ``respect_gitignore`` are taken from ``base`` when files are
+    discovered.
+    """
+
+    def __init__(self, base, root):
+        self.base = base if isinstance(base, Config) else Config(base)
+        root = os.path.abspath(root)
+        self.root = root if os.path.isdir(root) else os.path.dirname(root)
+        self._directories = {}
+        self._configs = {self.base.fingerprint: self.base}
+        self._base_directory = os.path.dirname(os.path.abspath(self.base.source)) if self.base.source else None
+
+    def clear(self):
+        """Forget resolved directories so config files are looked at again."""
+        self._directories = {}
+
+    def reloaded(self):
+        """A new resolver for ``root`` with ``base`` read again from its file."""
+        base = load_config(self.base.source) if self.base.source else self.base
+        return ConfigResolver(base, self.root)
+
+    def config_for(self, path):
+        """The config that applies to the file ``path``."""
+        return self.for_directory(os.path.dirname(os.path.abspath(path)))
+
+    def _is_top(self, directory):
+        return directory == self._base_directory or os.path.exists(os.path.join(directory, '.git'))
+
+    def _top_for(self, directory):
+        """The outermost directory whose config files apply below it."""
+        current = directory
+        while not self._is_top(current):
+            parent = os.path.dirname(current)
+            if parent == current:
+                # Not inside a project; go no higher than root
+                under_root = directory == self.root or directory.startswith(os.path.join(self.root, ''))
+                return self.root if under_root else directory
+            current = parent
+        return current
+
+    def for_directory(self, directory, top=None):
+        config = self._directories.get(directory)
+        if config is not None:
+            return config
+        if top is None:
+            top = self._top_for(directory)
+        if directory == top:
+            parent = self.base
+        else:
+            parent = self.for_directory(os.path.dirname(directory), top)
+        config = parent
+        # A base loaded from a file wins over the files at the top
+        if directory == top and self.base.source:
+            overrides = None
+        else:
+            overrides, source = directory_overrides(directory)
+        if overrides:
+            config = parent.merged(overrides, source)
+            # Share one object per distinct set of values
+            config = self._configs.setdefault(config.fingerprint, config)
+        self._directories[directory] = config
+        return config
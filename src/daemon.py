@@ -0,0 +1,176 @@
+"""Long-running analysis server behind a Unix domain socket.
+
+The daemon keeps one analyzer per distinct config, the parsed config
+files and the result cache resident, so ``client.py`` invocations
+(pre-commit hooks, editor integrations) skip interpreter-wide imports and
+cache warm-up. Config files, nested ones included, are reparsed only when
+they change on disk.
+
+Each connection carries one JSON request line and gets one JSON
+response. Requests are handled one at a time, as the analyzers are not
+thread-safe.
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+
+try:
+    from .main import ScopedAnalyzer, ScopedCache, load_config, analyze_paths, format_results
+    from .config import ConfigResolver
+    from .cache import ResultCache, WarmCache
+    from .discovery import FileDiscovery
+    from .client import default_socket_path
+except ImportError:
+    from main import ScopedAnalyzer, ScopedCache, load_config, analyze_paths, format_results
+    from config import ConfigResolver
+    from cache import ResultCache, WarmCache
+    from discovery import FileDiscovery
+    from client import default_socket_path
+
+
+class AnalysisDaemon:
+    def __init__(self, cache_dir='.codesage_cache', use_cache=True):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.use_cache = use_cache
+        # Keys carry the config fingerprint, so one cache serves every config
+        self.cache = WarmCache(ResultCache(self.cache_dir), use_cache)
+        # config fingerprint -> CodeSage, shared by all requests
+        self.analyzers = {}
+        self.running = True
+
+    def analyze(self, request):
+        cwd = request.get('cwd') or os.getcwd()
+        # Reparsed only when the file changed since the last request
+        config = load_config(os.path.join(cwd, request.get('config', 'config.yaml')))
+        paths = request.get('paths')
+        if not paths or not isinstance(paths, list):
+            raise ValueError("an analyze request needs a list of paths")
+        results = {}
+        for path in paths:
+            root = os.path.join(cwd, path)
+            resolver = ConfigResolver(config, root)
+            sage = ScopedAnalyzer(resolver, analyzers=self.analyzers)
+            cache = ScopedCache(resolver, self.cache_dir, backend=self.cache)
+            discovery = FileDiscovery(root, excludes=config.get('exclude', ()),
+                                      use_gitignore=config.get('respect_gitignore', True))
+            for file_path, result in analyze_paths(sage, discovery, cache).items():
+                # Report paths the way the client spelled them
+                if file_path != root:
+                    file_path = os.path.join(path, os.path.relpath(file_path, root))
+                else:
+                    file_path = path
+                result.path = file_path
+                results[file_path] = result
+        if self.cache.writes and self.use_cache:
+            self.cache.writes = 0
+            self.cache.disk.prune()
+        return {"output": format_results(results, request.get('format', 'text'))}
+
+    def status(self):
+        cache = self.cache
+        return {"output": f"{len(cache)} cached files, {cache.hits} hits, {cache.misses} misses, "
+                          f"{len(self.analyzers)} configs"}
+
+    def handle(self, request):
+        """Answer one decoded request with a response dict.
+
+        Every failure, including unexpected ones, is answered with an
+        ``error`` so the client never waits on a dropped connection.
+        """
+        if not isinstance(request, dict):
+            return {"error": "malformed request: expected a JSON object"}
+        command = request.get('command', 'analyze')
+        try:
+            if command == 'analyze':
+                return self.analyze(request)
+            if command == 'status':
+                return self.status()
+            if command == 'shutdown':
+                self.running = False
+                return {"output": "CodeSage daemon stopped."}
+            return {"error": f"unknown command {command!r}"}
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # A bare connect, e.g. a liveness probe
+            return
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {"error": f"malformed request: {e}"}
+        else:
+            response = self.server.daemon.handle(request)
+        try:
+            self.wfile.write(json.dumps(response, default=str).encode('utf-8'))
+        except OSError:
+            # The client went away before reading the answer
+            pass
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    def __init__(self, socket_path, daemon):
+        self.daemon = daemon
+        # Only the owner may talk to the daemon
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def serve(self):
+        while self.daemon.running:
+            self.handle_request()
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(socket_path):
+    """Remove a socket left behind by a daemon that died; False if one is live."""
+    if not os.path.exists(socket_path):
+        return True
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)
+            return True
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CodeSage analysis daemon")
+    parser.add_argument('--socket', default=default_socket_path(), help="Unix socket to listen on")
+    parser.add_argument('--cache-dir', default='.codesage_cache', help="Directory for cached results")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Keep results in memory only, without the on-disk cache")
+    args = parser.parse_args(argv)
+
+    if not _remove_stale_socket(args.socket):
+        print(f"A CodeSage daemon is already listening on {args.socket}", file=sys.stderr)
+        return 1
+    server = DaemonServer(args.socket, AnalysisDaemon(args.cache_dir, not args.no_cache))
+    print(f"CodeSage daemon listening on {args.socket}", file=sys.stderr, flush=True)
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
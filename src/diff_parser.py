@@ -0,0 +1,125 @@
+"""Parsing of unified diffs into the set of lines a change touched."""
+import bisect
+import re
+
+HUNK_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+class ChangedLines:
+    """Sorted, merged ranges of added or modified line numbers in a file."""
+
+    def __init__(self, ranges=()):
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+    def __contains__(self, line):
+        index = bisect.bisect_right(self.starts, line) - 1
+        return index >= 0 and line <= self.ends[index]
+
+    def __iter__(self):
+        for start, end in zip(self.starts, self.ends):
+            yield from range(start, end + 1)
+
+    def __bool__(self):
+        return bool(self.starts)
+
+    def __repr__(self):
+        return f"ChangedLines({list(zip(self.starts, self.ends))!r})"
+
+    def overlaps(self, start, end):
+        """True if any changed line falls within ``start``..``end``."""
+        index = bisect.bisect_right(self.starts, end) - 1
+        return index >= 0 and self.ends[index] >= start
+
+
+C_ESCAPES = {'a': 7, 'b': 8, 't': 9, 'n': 10, 'v': 11, 'f': 12, 'r': 13, '"': 34, '\\': 92}
+
+
+def unquote_path(path):
+    """Undo git's C-style quoting of a path such as ``"b/a\\tb.py"``."""
+    if not (len(path) >= 2 and path.startswith('"') and path.endswith('"')):
+        return path
+    data = bytearray()
+    body = path[1:-1]
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char == '\\' and i + 1 < len(body):
+            escape = body[i + 1]
+            if escape in '01234567':
+                data.append(int(body[i + 1:i + 4], 8))
+                i += 4
+                continue
+            data.append(C_ESCAPES.get(escape, ord(escape)))
+            i += 2
+            continue
+        data.extend(char.encode('utf-8', 'surrogateescape'))
+        i += 1
+    return data.decode('utf-8', 'surrogateescape')
+
+
+def parse_unified_diff(diff_text):
+    """Map each file in ``diff_text`` to the ``ChangedLines`` it adds.
+
+    Deleted files are left out; removed lines only shift the numbering of
+    the new file and are not reported themselves.
+    """
+    ranges = {}
+    current = None
+    old_left = new_left = 0
+    line_no = 0
+    run_start = None
+
+    def close_run():
+        nonlocal run_start
+        if run_start is not None and current is not None:
+            ranges[current].append((run_start, line_no - 1))
+        run_start = None
+
+    # Not splitlines(): form feeds and other separators can occur inside a line
+    for line in diff_text.split('\n'):
+        if line.endswith('\r'):
+            line = line[:-1]
+        if old_left > 0 or new_left > 0:
+            if line.startswith('+'):
+                if run_start is None:
+                    run_start = line_no
+                line_no += 1
+                new_left -= 1
+                continue
+            close_run()
+            if line.startswith('-'):
+                old_left -= 1
+            elif line.startswith('\\'):
+                pass
+            else:
+                line_no += 1
+                old_left -= 1
+                new_left -= 1
+            continue
+
+        close_run()
+        match = HUNK_RE.match(line)
+        if match:
+            old_left = int(match.group(2)) if match.group(2) is not None else 1
+            line_no = int(match.group(3))
+            new_left = int(match.group(4)) if match.group(4) is not None else 1
+        elif line.startswith('+++ '):
+            path = line[4:]
+            path = unquote_path(path) if path.startswith('"') else path.split('\t')[0]
+            if path == '/dev/null':
+                current = None
+            else:
+                current = path[2:] if path.startswith('b/') else path
+                ranges.setdefault(current, [])
+        elif line.startswith('diff --git '):
+            current = None
+    close_run()
+
+    return {path: ChangedLines(file_ranges) for path, file_ranges in ranges.items()}
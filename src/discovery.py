@@ -0,0 +1,215 @@
+"""Lazy discovery of Python files with ``.gitignore``-style pruning.
+
+Directories are read with ``os.scandir`` and ignored directories are never
+entered, so vendored environments and build output cost a single
+``scandir`` entry instead of a full walk. Paths are yielded as soon as
+they are found, letting analysis start while the walk is still running.
+"""
+import os
+import re
+
+DEFAULT_EXCLUDES = (
+    '.git/', '.hg/', '.svn/', '__pycache__/', '.tox/', '.nox/', '.mypy_cache/',
+    '.pytest_cache/', '.ruff_cache/', '.codesage_cache/', 'venv/', '.venv/',
+    'node_modules/', 'build/', 'dist/', '*.egg-info/',
+)
+
+
+def _translate(pattern):
+    """Translate the glob part of an ignore pattern into a regex."""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == len(pattern):
+            regex.append('/.*')
+            i += 3
+            continue
+        if char == '*':
+            regex.append('.*' if pattern.startswith('**', i) else '[^/]*')
+            i += 2 if pattern.startswith('**', i) else 1
+            continue
+        if char == '?':
+            regex.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif char == '\\' and i + 1 < len(pattern):
+            i += 1
+            regex.append(re.escape(pattern[i]))
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return ''.join(regex)
+
+
+class IgnorePattern:
+    def __init__(self, pattern, base=''):
+        self.negated = pattern.startswith('!')
+        if self.negated:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        prefix = re.escape(base + '/') if base else ''
+        if not anchored:
+            prefix += '(?:.*/)?'
+        self.regex = re.compile(prefix + _translate(pattern) + r'\Z', re.DOTALL)
+
+    def matches(self, rel_path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.match(rel_path) is not None
+
+
+def parse_ignore_lines(lines, base=''):
+    patterns = []
+    for line in lines:
+        line = line.rstrip('\n').rstrip('\r')
+        if not line.strip() or line.startswith('#'):
+            continue
+        if not line.endswith('\\ '):
+            line = line.rstrip(' ')
+        patterns.append(IgnorePattern(line, base))
+    return patterns
+
+
+def _is_ignored(patterns, rel_path, is_dir):
+    ignored = False
+    for pattern in patterns:
+        if pattern.negated == ignored and pattern.matches(rel_path, is_dir):
+            ignored = not pattern.negated
+    return ignored
+
+
+class FileDiscovery:
+    """The Python files under ``root`` that are not ignored.
+
+    ``excludes`` are ``.gitignore``-style patterns relative to ``root``;
+    with ``use_gitignore`` every ``.gitignore`` found on the way down is
+    honoured for its own subtree. The patterns in effect for each
+    directory are worked out once and remembered, so single paths (say,
+    from a file watcher) can be checked cheaply with ``is_ignored``.
+    """
+
+    def __init__(self, root, excludes=(), use_gitignore=True, use_default_excludes=True):
+        self.root = root
+        self.single_file = os.path.isfile(root)
+        self.use_gitignore = use_gitignore
+        self._base_patterns = []
+        if use_default_excludes:
+            self._base_patterns.extend(parse_ignore_lines(DEFAULT_EXCLUDES))
+        self._base_patterns.extend(parse_ignore_lines(excludes or ()))
+        self._patterns = {}
+
+    def reload(self):
+        """Forget remembered patterns, e.g. after a ``.gitignore`` changed."""
+        self._patterns = {}
+
+    def _patterns_for(self, rel_dir):
+        """Patterns that apply to entries of the directory ``rel_dir``."""
+        patterns = self._patterns.get(rel_dir)
+        if patterns is not None:
+            return patterns
+        if rel_dir:
+            patterns = self._patterns_for(rel_dir.rpartition('/')[0])
+        else:
+            patterns = self._base_patterns
+        if self.use_gitignore:
+            gitignore = os.path.join(self.root, *rel_dir.split('/'), '.gitignore')
+            try:
+                with open(gitignore, 'r', encoding='utf-8', errors='replace') as f:
+                    patterns = patterns + parse_ignore_lines(f, rel_dir)
+            except OSError:
+                pass
+        self._patterns[rel_dir] = patterns
+        return patterns
+
+    def is_ignored(self, path, is_dir=None):
+        """True if ``path`` (inside ``root``) or one of its parents is ignored."""
+        rel_path = os.path.relpath(path, self.root).replace(os.sep, '/')
+        if rel_path == '.':
+            return False
+        if rel_path == '..' or rel_path.startswith('../'):
+            return True
+        parts = rel_path.split('/')
+        rel_dir = ''
+        for index, part in enumerate(parts):
+            rel = rel_dir + '/' + part if rel_dir else part
+            last = index == len(parts) - 1
+            part_is_dir = not last or (os.path.isdir(path) if is_dir is None else is_dir)
+            if _is_ignored(self._patterns_for(rel_dir), rel, part_is_dir):
+                return True
+            rel_dir = rel
+        return False
+
+    def wants(self, path):
+        """True if ``path`` is a Python file this discovery would yield."""
+        if self.single_file:
+            return os.path.abspath(path) == os.path.abspath(self.root)
+        return path.endswith('.py') and not self.is_ignored(path, is_dir=False)
+
+    def _walk(self):
+        """Yield ``(path, is_dir)`` for every entry that is not ignored."""
+        stack = [(self.root, '')]
+        while stack:
+            directory, rel_dir = stack.pop()
+            patterns = self._patterns_for(rel_dir)
+            try:
+                with os.scandir(directory) as scanner:
+                    entries = sorted(scanner, key=lambda entry: entry.name)
+            except OSError:
+                continue
+
+            subdirs = []
+            for entry in entries:
+                rel_path = rel_dir + '/' + entry.name if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if _is_ignored(patterns, rel_path, is_dir):
+                    continue
+                yield entry.path, is_dir
+                if is_dir:
+                    subdirs.append((entry.path, rel_path))
+            stack.extend(reversed(subdirs))
+
+    def __iter__(self):
+        if self.single_file:
+            if os.path.isfile(self.root):
+                yield self.root
+            return
+        for path, is_dir in self._walk():
+            if not is_dir and path.endswith('.py'):
+                yield path
+
+    def iter_directories(self):
+        """Yield ``root`` and every directory below it that is not ignored.
+
+        For a single-file root this is just the directory holding the file.
+        """
+        if self.single_file:
+            yield os.path.dirname(self.root) or os.curdir
+        elif os.path.isdir(self.root):
+            yield self.root
+            for path, is_dir in self._walk():
+                if is_dir:
+                    yield path
+
+
+def iter_python_files(root, excludes=(), use_gitignore=True, use_default_excludes=True):
+    """Yield the ``.py`` files under ``root`` that are not ignored."""
+    return iter(FileDiscovery(root, excludes, use_gitignore, use_default_excludes))
@@ -0,0 +1,110 @@
+"""Read revisions and blobs straight from a local git repository.
+
+Nothing is checked out: changed files are listed with ``git diff-tree``
+and their content is streamed from the object database through one
+long-lived ``git cat-file --batch`` process, so PR analysis runs against
+an existing clone without touching its work tree or the current
+directory. Every git call takes a list of arguments; nothing goes
+through a shell.
+"""
+import subprocess
+
+try:
+    from .diff_parser import parse_unified_diff
+except ImportError:
+    from diff_parser import parse_unified_diff
+
+
+class GitError(RuntimeError):
+    """A git command failed or an object could not be found."""
+
+
+class GitRepository:
+    def __init__(self, path='.'):
+        self.path = path
+        self._cat_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def git(self, *args):
+        """Run a git command in the repository and return its stdout as bytes."""
+        try:
+            result = subprocess.run(["git", "-C", self.path, *args], capture_output=True, check=True)
+        except subprocess.CalledProcessError as e:
+            raise GitError(e.stderr.decode('utf-8', 'replace').strip() or str(e)) from None
+        return result.stdout
+
+    def resolve(self, revision):
+        """The commit SHA ``revision`` names."""
+        return self.git("rev-parse", "--verify", "--end-of-options",
+                        revision + "^{commit}").decode('ascii').strip()
+
+    def has_commit(self, revision):
+        try:
+            self.resolve(revision)
+        except GitError:
+            return False
+        return True
+
+    def merge_base(self, base, head):
+        return self.git("merge-base", base, head).decode('ascii').strip()
+
+    def changed_files(self, base, head, suffix='.py'):
+        """Map each file added, modified or renamed between two revisions
+        to its blob SHA at ``head``."""
+        output = self.git("diff-tree", "-r", "-z", "--no-commit-id", "--diff-filter=AMR", "-M",
+                          base, head)
+        fields = output.split(b'\0')
+        changed = {}
+        i = 0
+        while i < len(fields) - 1:
+            # ":old_mode new_mode old_sha new_sha status", then one path
+            # (two for renames and copies)
+            _, _, _, new_sha, status = fields[i].decode('ascii').split()
+            i += 1
+            if status[0] in 'RC':
+                i += 1
+            path = fields[i].decode('utf-8', 'surrogateescape')
+            i += 1
+            if path.endswith(suffix):
+                changed[path] = new_sha
+        return changed
+
+    def changed_lines(self, base, head):
+        """Map each changed file to the ChangedLines added between two revisions.
+
+        The patch comes from plumbing with fixed prefixes and unquoted
+        paths, so settings such as ``diff.noprefix`` or ``core.quotepath``
+        cannot make its paths differ from those of ``changed_files``.
+        """
+        output = self.git("-c", "core.quotepath=off", "diff-tree", "-r", "-p", "-U0", "--no-commit-id",
+                          "--no-color", "--no-ext-diff", "--no-textconv", "-M",
+                          "--src-prefix=a/", "--dst-prefix=b/", base, head)
+        return parse_unified_diff(output.decode('utf-8', 'surrogateescape'))
+
+    def read_blob(self, sha):
+        """Content of a blob, through the shared ``cat-file --batch`` process."""
+        if self._cat_file is None:
+            self._cat_file = subprocess.Popen(["git", "-C", self.path, "cat-file", "--batch"],
+                                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        process = self._cat_file
+        process.stdin.write(sha.encode('ascii') + b'\n')
+        process.stdin.flush()
+        header = process.stdout.readline().split()
+        if len(header) != 3:
+            raise GitError(f"object {sha} is missing")
+        size = int(header[2])
+        data = process.stdout.read(size)
+        process.stdout.read(1)
+        return data
+
+    def close(self):
+        if self._cat_file is not None:
+            self._cat_file.stdin.close()
+            self._cat_file.wait()
+            self._cat_file.stdout.close()
+            self._cat_file = None
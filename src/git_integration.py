@@ -1,31 +1,53 @@
 import os
-import subprocess
-from github import Github
 from .main import CodeSage, load_config
+from .git_backend import GitRepository
 
-def get_changed_files(base_branch, head_branch):
-    """Get the list of changed files between two branches."""
-    cmd = f"git diff --name-only {base_branch}..{head_branch}"
-    result = subprocess.run(cmd, capture_output=True, text=True, shell=True)
-    return [file for file in result.stdout.split('\n') if file.endswith('.py')]
+def get_changed_files(base_branch, head_branch, repo_path='.'):
+    """Get the list of Python files changed between two branches."""
+    with GitRepository(repo_path) as repo:
+        return list(repo.changed_files(base_branch, head_branch))
 
-def analyze_pr(repo_path, base_branch, head_branch, github_token, repo_name, pr_number):
-    """Analyze the changes in a pull request."""
-    os.chdir(repo_path)
-    
-    config = load_config('config.yaml')
+def get_changed_lines(base_branch, head_branch, repo_path='.'):
+    """Map each changed Python file to the lines added or modified in it."""
+    with GitRepository(repo_path) as repo:
+        return {path: lines for path, lines in repo.changed_lines(base_branch, head_branch).items()
+                if path.endswith('.py')}
+
+def analyze_changes(repo_path, base_branch, head_branch, config, changed_lines_only=False):
+    """Analyze the Python files changed between two revisions of a local repo.
+
+    Files are read from git objects at ``head_branch``; the work tree is
+    never checked out or read.
+    """
     sage = CodeSage(config)
-    
-    changed_files = get_changed_files(base_branch, head_branch)
     results = {}
-    
-    for file_path in changed_files:
-        issues = sage.analyze_file(file_path)
-        if issues:
-            results[file_path] = issues
-    
+    with GitRepository(repo_path) as repo:
+        changed = repo.changed_files(base_branch, head_branch)
+        lines = repo.changed_lines(base_branch, head_branch) if changed_lines_only else {}
+        for file_path, blob in changed.items():
+            changed_lines = lines.get(file_path) if changed_lines_only else None
+            if changed_lines_only and not changed_lines:
+                # Only deletions or a pure rename: nothing was added
+                continue
+            issues = sage.analyze_source(repo.read_blob(blob), file_path, changed_lines)
+            if issues:
+                results[file_path] = issues
+    return results
+
+def analyze_pr(repo_path, base_branch, head_branch, github_token, repo_name, pr_number,
+               changed_lines_only=False):
+    """Analyze the changes in a pull request.
+
+    With ``changed_lines_only`` only the lines the PR touches, and the
+    functions and classes around them, are checked.
+    """
+    config = load_config(os.path.join(repo_path, 'config.yaml'))
+    results = analyze_changes(repo_path, base_branch, head_branch, config, changed_lines_only)
+
     # Post results to GitHub
-    g = Github(github_token)
+    from github import Auth, Github
+
+    g = Github(auth=Auth.Token(github_token))
     repo = g.get_repo(repo_name)
     pull_request = repo.get_pull(pr_number)
     
@@ -46,5 +68,7 @@ if __name__ == "__main__":
     github_token = os.environ.get('GITHUB_TOKEN')
     repo_name = os.environ.get('REPO_NAME')
     pr_number = int(os.environ.get('PR_NUMBER'))
+    changed_lines_only = os.environ.get('CHANGED_LINES_ONLY', '').lower() in ('1', 'true', 'yes')
     
-    analyze_pr(repo_path, base_branch, head_branch, github_token, repo_name, pr_number)
\ No newline at end of file
+    analyze_pr(repo_path, base_branch, head_branch, github_token, repo_name, pr_number,
+               changed_lines_only)
\ No newline at end of file
@@ -1,26 +1,49 @@
-from jinja2 import Template
-
-def generate_detailed_report(results):
-    grouped_issues = {}
-    total_issues = 0
-    for file, issues in results.items():
-        total_issues += len(issues)
-        for issue in issues:
-            if issue['type'] not in grouped_issues:
-                grouped_issues[issue['type']] = []
-            grouped_issues[issue['type']].append({**issue, 'file': file})
-
-    template = Template('''
+REPORT_SOURCE = '''
     <h2>CodeSage Detailed Report</h2>
     {% for issue_type, issues in grouped_issues.items() %}
     <h3 class="issue-type">{{ issue_type | replace("_", " ") | title }}</h3>
-    {% for issue in issues %}
+    {% for file, issue in issues %}
     <div class="issue">
-        <strong>{{ issue.file }}:{{ issue.line }}</strong> {{ issue.message }}
+        <strong>{{ file }}:{{ issue.line }}</strong> {{ issue.message }}
     </div>
     {% endfor %}
     {% endfor %}
     <p><em>Total issues found: {{ total_issues }}</em></p>
-    ''')
-    
-    return template.render(grouped_issues=grouped_issues, total_issues=total_issues)
\ No newline at end of file
+    '''
+
+_report_template = None
+
+def get_report_template():
+    """Compile the report template on first use; Jinja2 is only imported then."""
+    global _report_template
+    if _report_template is None:
+        from jinja2 import Environment
+
+        _report_template = Environment().from_string(REPORT_SOURCE)
+    return _report_template
+
+# Number of template output pieces joined into each streamed chunk.
+STREAM_BUFFER_SIZE = 64
+
+def _group_issues(results):
+    """Group ``(file, issue)`` pairs by issue type without copying issues."""
+    grouped_issues = {}
+    total_issues = 0
+    for file, issues in results.items():
+        total_issues += len(issues)
+        for issue in issues:
+            issue_type = issue['type']
+            if issue_type not in grouped_issues:
+                grouped_issues[issue_type] = []
+            grouped_issues[issue_type].append((file, issue))
+    return grouped_issues, total_issues
+
+def generate_stream(results):
+    """Yield the detailed report in chunks as it is rendered."""
+    grouped_issues, total_issues = _group_issues(results)
+    stream = get_report_template().stream(grouped_issues=grouped_issues, total_issues=total_issues)
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    return iter(stream)
+
+def generate_detailed_report(results):
+    return ''.join(generate_stream(results))
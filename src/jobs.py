@@ -0,0 +1,161 @@
+"""Background analysis jobs for the web interface.
+
+Submitting a job returns at once; its files are analyzed on a shared
+AnalysisPool by a small thread pool, and each file's result is recorded
+as soon as it finishes, so clients can poll the job or follow it as a
+stream of events. A file whose analysis fails is recorded as an error of
+the job and the other files are still analyzed. Finished jobs are
+forgotten ``ttl`` seconds after they end.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when ``max_jobs`` jobs are already queued or running."""
+
+
+def describe_error(error):
+    return f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+
+class Job:
+    def __init__(self, job_id, filenames):
+        self.id = job_id
+        self.filenames = filenames
+        self.status = 'queued'
+        self.error = None
+        # (filename, FileResult or exception) pairs in the order files finished
+        self.completed = []
+        self.finished_at = None
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.finished_at is not None
+
+    @property
+    def results(self):
+        """Results of the files analyzed without error, by filename, in upload order."""
+        with self._changed:
+            results = dict(self.completed)
+        return {filename: results[filename] for filename in self.filenames
+                if filename in results and not isinstance(results[filename], Exception)}
+
+    @property
+    def errors(self):
+        """Why analysis failed, for each file it failed on."""
+        with self._changed:
+            return {filename: describe_error(result) for filename, result in self.completed
+                    if isinstance(result, Exception)}
+
+    def start(self):
+        with self._changed:
+            self.status = 'running'
+            self._changed.notify_all()
+
+    def add(self, filename, result):
+        with self._changed:
+            self.completed.append((filename, result))
+            self._changed.notify_all()
+
+    def finish(self, error=None):
+        with self._changed:
+            self.status = 'failed' if error else 'done'
+            self.error = error
+            self.finished_at = time.monotonic()
+            self._changed.notify_all()
+
+    def to_dict(self, include_results=True):
+        with self._changed:
+            data = {'id': self.id, 'status': self.status,
+                    'files': len(self.filenames), 'completed': len(self.completed)}
+            if self.error:
+                data['error'] = self.error
+        errors = self.errors
+        if errors:
+            data['errors'] = errors
+        if include_results and data['status'] == 'done':
+            data['results'] = {filename: result.to_dicts() for filename, result in self.results.items()}
+        return data
+
+    def events(self, timeout=None):
+        """Yield ``(filename, result)`` for every file as it finishes, from
+        the first one on, until the job ends. ``result`` is the exception
+        for a file whose analysis failed.
+
+        ``None`` is yielded whenever ``timeout`` seconds pass without news,
+        so a stream can send keep-alives.
+        """
+        sent = 0
+        while True:
+            with self._changed:
+                if sent == len(self.completed) and not self.finished:
+                    self._changed.wait(timeout)
+                items = self.completed[sent:]
+                ended = self.finished
+            if not items and not ended:
+                yield None
+            for item in items:
+                yield item
+            sent += len(items)
+            if ended and sent == len(self.completed):
+                return
+
+
+class JobQueue:
+    """Runs analysis jobs on ``pool``, at most ``max_workers`` at a time.
+
+    No more than ``max_jobs`` jobs may be queued or running; ``submit``
+    raises JobQueueFull beyond that.
+    """
+
+    def __init__(self, pool, max_workers=2, max_jobs=16, ttl=600):
+        self.pool = pool
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='codesage-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, sources):
+        """Queue ``(filename, source)`` pairs for analysis and return their Job."""
+        sources = list(sources)
+        with self._lock:
+            self._expire()
+            if sum(not job.finished for job in self._jobs.values()) >= self.max_jobs:
+                raise JobQueueFull("Too many analysis jobs are queued")
+            job = Job(uuid.uuid4().hex, [filename for filename, _ in sources])
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, sources)
+        return job
+
+    def get(self, job_id):
+        """The job with this id, or None if it is unknown or has expired."""
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def _expire(self):
+        deadline = time.monotonic() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < deadline]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _run(self, job, sources):
+        job.start()
+        try:
+            # Queued jobs wait for the pool rather than fail when it is busy
+            for filename, result in self.pool.iter_analyze_sources(sources, wait=True):
+                job.add(filename, result)
+        except Exception as e:
+            job.finish(describe_error(e))
+        else:
+            job.finish()
+
+    def shutdown(self):
+        """Stop taking jobs and wait for the running ones to finish."""
+        self._executor.shutdown(wait=True)
@@ -1,96 +1,212 @@
 import ast
-import os
 import argparse
-import yaml
+import sys
 import json
-from mccabe import PathGraphingAstVisitor
+from time import perf_counter
+
+try:
+    from .rules import (RuleEngine, FunctionLengthRule, VariableNamingRule, ImportStyleRule,
+                        McCabeComplexityRule, DocstringRule)
+    from .cache import ResultCache
+    from .source_reader import open_source, decode_error
+    from .discovery import FileDiscovery
+    from .results import FileResult, Issue, issue_to_json
+    from .profiling import Profile, PARSE
+    from .config import CONFIG_FILES, Config, ConfigError, ConfigResolver, fingerprint, load_config
+except ImportError:
+    from rules import (RuleEngine, FunctionLengthRule, VariableNamingRule, ImportStyleRule,
+                       McCabeComplexityRule, DocstringRule)
+    from cache import ResultCache
+    from source_reader import open_source, decode_error
+    from discovery import FileDiscovery
+    from results import FileResult, Issue, issue_to_json
+    from profiling import Profile, PARSE
+    from config import CONFIG_FILES, Config, ConfigError, ConfigResolver, fingerprint, load_config
+
+__version__ = "0.2.0"
 
 class CodeSage:
-    def __init__(self, config):
+    def __init__(self, config, profile=None):
+        # Only the individual check_* helpers collect into self.issues;
+        # analyze_file and analyze_source return a fresh FileResult.
         self.issues = []
         self.config = config
+        # Optional profiling.Profile that receives per-rule and per-file stats
+        self.profile = profile
+        self.engine = RuleEngine(self.build_rules())
+
+    def analyze_file(self, file_path, changed_lines=None):
+        with open_source(file_path) as data:
+            return self.analyze_source(data, file_path, changed_lines)
+
+    def analyze_source(self, source, filename='<unknown>', changed_lines=None):
+        """Analyze source text or bytes that need not exist on disk.
 
-    def analyze_file(self, file_path):
-        with open(file_path, 'r') as file:
-            content = file.read()
-        
-        tree = ast.parse(content)
-        self.check_function_length(tree)
-        self.check_variable_naming(tree)
-        self.check_import_style(tree)
-        self.check_complexity(tree, file_path)
-        self.check_docstrings(tree)
-        
-        return self.issues
+        Bytes go to the parser undecoded, so coding cookies and BOMs are
+        honoured; bytes that cannot be decoded are reported as a
+        ``decode_error`` issue instead of raising. With ``changed_lines``
+        (a ChangedLines from a diff) only the changed lines and the
+        definitions overlapping them are checked.
+        """
+        profile = self.profile
+        if profile is not None:
+            started = perf_counter()
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            error = None if isinstance(source, str) else decode_error(source)
+            if error is None:
+                raise
+            return FileResult(filename, [Issue('decode_error', error.lineno, 0, (str(error),))])
+        if profile is not None:
+            profile.add_rule(PARSE, perf_counter() - started)
+        result = FileResult(filename, self.engine.run(tree, changed=changed_lines, profile=profile))
+        if profile is not None:
+            profile.add_file(filename, perf_counter() - started, self.engine.last_node_count, len(result))
+        return result
 
     def check_function_length(self, tree):
-        max_length = self.config.get('max_function_length', 20)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                if len(node.body) > max_length:
-                    self.issues.append({
-                        "type": "function_length",
-                        "message": f"Function '{node.name}' is too long ({len(node.body)} lines). Consider breaking it down.",
-                        "line": node.lineno
-                    })
+        self.run_rules([FunctionLengthRule(self.config)], tree)
 
     def check_variable_naming(self, tree):
         if not self.config.get('check_variable_naming', True):
             return
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Name) and not node.id.islower():
-                self.issues.append({
-                    "type": "variable_naming",
-                    "message": f"Variable '{node.id}' should be in lowercase with words separated by underscores.",
-                    "line": node.lineno
-                })
+        self.run_rules([VariableNamingRule(self.config)], tree)
 
     def check_import_style(self, tree):
         if not self.config.get('check_import_style', True):
             return
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import) or isinstance(node, ast.ImportFrom):
-                if any('*' in alias.name for alias in node.names):
-                    self.issues.append({
-                        "type": "import_style",
-                        "message": f"Avoid using 'from module import *'. It's better to import specific names.",
-                        "line": node.lineno
-                    })
+        self.run_rules([ImportStyleRule(self.config)], tree)
 
     def check_complexity(self, tree, filename):
-        max_complexity = self.config.get('max_complexity', 10)
-        visitor = PathGraphingAstVisitor()
-        visitor.preorder(tree, visitor)
-        for graph in visitor.graphs.values():
-            if graph.complexity() > max_complexity:
-                self.issues.append({
-                    "type": "complexity",
-                    "message": f"Function '{graph.entity}' is too complex (complexity: {graph.complexity()})",
-                    "line": graph.lineno
-                })
+        self.run_rules([McCabeComplexityRule(self.config)], tree)
 
     def check_docstrings(self, tree):
         if not self.config.get('check_docstrings', True):
             return
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.Module)):
-                if not ast.get_docstring(node):
-                    node_type = type(node).__name__.lower().replace('def', '')
-                    if isinstance(node, ast.Module):
-                        line_num = 1
-                        name = 'module'
-                    else:
-                        line_num = node.lineno
-                        name = node.name
-                    self.issues.append({
-                        "type": "missing_docstring",
-                        "message": f"{node_type.capitalize()} '{name}' is missing a docstring.",
-                        "line": line_num
-                    })
-
-def load_config(config_path):
-    with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
+        self.run_rules([DocstringRule(self.config)], tree)
+
+    def build_rules(self):
+        rules = [FunctionLengthRule(self.config)]
+        if self.config.get('check_variable_naming', True):
+            rules.append(VariableNamingRule(self.config))
+        if self.config.get('check_import_style', True):
+            rules.append(ImportStyleRule(self.config))
+        rules.append(McCabeComplexityRule(self.config))
+        if self.config.get('check_docstrings', True):
+            rules.append(DocstringRule(self.config))
+        return rules
+
+    def run_rules(self, rules, tree):
+        self.issues.extend(RuleEngine(rules).run(tree))
+
+def config_fingerprint(config):
+    """Stable hash of a loaded config, used to key cached results."""
+    if isinstance(config, Config):
+        return config.fingerprint
+    return fingerprint(config)
+
+class ScopedAnalyzer:
+    """Analyzes each file with the config in effect for its directory.
+
+    Stands in for a CodeSage wherever one analyzes files by path. There is
+    one analyzer per distinct config, shared through ``analyzers`` (a
+    dict keyed by config fingerprint) if one is given.
+    """
+
+    def __init__(self, resolver, profile=None, factory=CodeSage, analyzers=None):
+        self.resolver = resolver
+        self.config = resolver.base
+        self.profile = profile
+        self.factory = factory
+        self.analyzers = {} if analyzers is None else analyzers
+
+    def use(self, resolver):
+        """Analyze with ``resolver``'s configs from now on."""
+        self.resolver = resolver
+        self.config = resolver.base
+        self.analyzers.clear()
+
+    def analyzer_for(self, path):
+        config = self.resolver.config_for(path)
+        sage = self.analyzers.get(config.fingerprint)
+        if sage is None:
+            sage = self.analyzers[config.fingerprint] = self.factory(config, self.profile)
+        return sage
+
+    def analyze_file(self, file_path, changed_lines=None):
+        return self.analyzer_for(file_path).analyze_file(file_path, changed_lines)
+
+    def analyze_source(self, source, filename='<unknown>', changed_lines=None):
+        return self.analyzer_for(filename).analyze_source(source, filename, changed_lines)
+
+class ScopedCache:
+    """A result cache whose keys use the config in effect for each file.
+
+    Keys are derived per file; entries are read from and written to
+    ``backend`` (by default a ResultCache in ``directory``).
+    """
+
+    def __init__(self, resolver, directory, backend=None):
+        self.resolver = resolver
+        self.directory = directory
+        self.backend = ResultCache(directory) if backend is None else backend
+        self._keyers = {}
+
+    def key_for_file(self, file_path):
+        fingerprint = self.resolver.config_for(file_path).fingerprint
+        keyer = self._keyers.get(fingerprint)
+        if keyer is None:
+            keyer = self._keyers[fingerprint] = ResultCache(self.directory,
+                                                            namespace=f"{__version__}:{fingerprint}")
+        return keyer.key_for_file(file_path)
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def put(self, key, records):
+        self.backend.put(key, records)
+
+    @property
+    def writes(self):
+        return self.backend.writes
+
+    def prune(self):
+        self.backend.prune()
+
+def analyze_paths(sage, file_paths, cache=None):
+    """Analyze each path, reusing ``cache`` entries for unchanged content."""
+    results = {}
+    for file_path in file_paths:
+        result = None
+        if cache is not None:
+            key = cache.key_for_file(file_path)
+            cached = cache.get(key)
+            if cached is not None:
+                result = FileResult.from_records(file_path, cached)
+        if result is None:
+            result = sage.analyze_file(file_path)
+            if cache is not None:
+                cache.put(key, result.to_records())
+        results[file_path] = result
+    return results
+
+def format_results(results, output_format):
+    """Render results as the CLI prints them; None for formats it doesn't print."""
+    if output_format == 'json':
+        return json.dumps(results, indent=2, default=issue_to_json)
+    if output_format != 'text':
+        return None
+    lines = []
+    for file_path, issues in results.items():
+        lines.append(f"Issues in {file_path}:")
+        if issues:
+            for issue in issues:
+                lines.append(f"- Line {issue['line']}: [{issue['type']}] {issue['message']}")
+        else:
+            lines.append("No issues found.")
+        lines.append("")
+    return "\n".join(lines)
 
 def main():
     parser = argparse.ArgumentParser(description="CodeSage: A Code Review Assistant")
@@ -99,33 +215,70 @@ def main():
     parser.add_argument('-f', '--format', choices=['text', 'json', 'html'], default='text', help="Output format")
     parser.add_argument('-o', '--output', help="Output file for JSON or HTML format")
     parser.add_argument('--check-coverage', action='store_true', help="Check test coverage")
+    parser.add_argument('--cache-dir', default='.codesage_cache', help="Directory for cached results")
+    parser.add_argument('--no-cache', action='store_true', help="Analyze every file, ignoring cached results")
+    parser.add_argument('--profile', action='store_true', help="Print the slowest rules and files to stderr")
+    parser.add_argument('--profile-output', help="Write per-rule and per-file timings as JSON to this file")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and re-check files as they change, printing only new and fixed issues")
+    parser.add_argument('--store', help="Record this run in a SQLite results store, reusing stored results")
     args = parser.parse_args()
 
     # ... rest of the main function ...
     config = load_config(args.config)
-    sage = CodeSage(config)
+    profile = Profile() if args.profile or args.profile_output else None
+    # Nested config.yaml / pyproject.toml files override the base config
+    resolver = ConfigResolver(config, args.path)
+    sage = ScopedAnalyzer(resolver, profile)
 
-    if os.path.isfile(args.path):
-        files = [args.path]
-    else:
-        files = [os.path.join(root, file) for root, _, files in os.walk(args.path) for file in files if file.endswith('.py')]
+    discovery = FileDiscovery(args.path, excludes=config.get('exclude', ()),
+                              use_gitignore=config.get('respect_gitignore', True))
 
-    results = {}
-    for file_path in files:
-        issues = sage.analyze_file(file_path)
-        results[file_path] = issues
-
-    if args.format == 'text':
-        for file_path, issues in results.items():
-            print(f"Issues in {file_path}:")
-            if issues:
-                for issue in issues:
-                    print(f"- Line {issue['line']}: [{issue['type']}] {issue['message']}")
-            else:
-                print("No issues found.")
-            print()
-    elif args.format == 'json':
-        print(json.dumps(results, indent=2))
+    store = cache = None
+    if args.store:
+        try:
+            from .store import ResultStore, current_commit
+        except ImportError:
+            from store import ResultStore, current_commit
+        # The store keeps results by blob hash and serves as the cache
+        store = ResultStore(args.store)
+        cache = store.begin_run(config_fingerprint(config), __version__, current_commit(args.path),
+                                args.path, reuse=not args.no_cache, config_for=resolver.config_for)
+    elif not args.no_cache:
+        cache = ScopedCache(resolver, args.cache_dir)
+
+    results = analyze_paths(sage, discovery, cache)
+    if store is not None:
+        cache.finish(results)
+        store.close()
+    elif cache is not None and cache.writes:
+        cache.prune()
+
+    output = format_results(results, args.format)
+    if output:
+        print(output)
+
+    if profile is not None:
+        if args.profile:
+            print(profile.format_report(), file=sys.stderr)
+        if args.profile_output:
+            profile.dump(args.profile_output)
+
+    if args.watch:
+        try:
+            from .watch import watch
+        except ImportError:
+            from watch import watch
+
+        def reload_config():
+            # Read the base and nested config files again for the rescan
+            try:
+                sage.use(sage.resolver.reloaded())
+            except (ConfigError, OSError) as e:
+                print(f"Could not reload the config: {e}", file=sys.stderr, flush=True)
+
+        watch(discovery, sage.analyze_file, results, config_names=[name for name, _ in CONFIG_FILES],
+              config_paths=[args.config], on_config_change=reload_config)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
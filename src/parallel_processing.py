@@ -1,16 +1,284 @@
 import multiprocessing
-from functools import partial
-from enhanced_analysis import EnhancedCodeSage
+import os
+import queue
+import threading
 
-def analyze_file_wrapper(config, file_path):
-    sage = EnhancedCodeSage(config)
-    return file_path, sage.analyze_file(file_path)
+try:
+    from .enhanced_analysis import EnhancedCodeSage
+    from .profiling import Profile
+    from .cache import ResultCache
+    from .results import FileResult
+except ImportError:
+    from enhanced_analysis import EnhancedCodeSage
+    from profiling import Profile
+    from cache import ResultCache
+    from results import FileResult
 
-def analyze_files_parallel(file_paths, config, num_processes=None):
+# Set in each worker process by _init_worker
+_worker_sage = None
+_worker_profiled = False
+
+def _init_worker(config, profiled=False):
+    """Build the worker's analyzer once; tasks then only carry paths."""
+    global _worker_sage, _worker_profiled
+    _worker_sage = EnhancedCodeSage(config)
+    _worker_profiled = profiled
+
+def _analyze_in_worker(file_path):
+    return file_path, _worker_sage.analyze_file(file_path)
+
+def _analyze_profiled_in_worker(file_path):
+    profile = Profile()
+    _worker_sage.profile = profile
+    try:
+        return file_path, (_worker_sage.analyze_file(file_path), profile.to_dict())
+    finally:
+        _worker_sage.profile = None
+
+def _analyze_source_in_worker(item):
+    filename, source = item
+    return filename, _worker_sage.analyze_source(source, filename)
+
+def _analyze_batch_in_worker(batch):
+    if not _worker_profiled:
+        return [_analyze_in_worker(file_path) for file_path in batch], None
+    profile = Profile()
+    _worker_sage.profile = profile
+    try:
+        results = [_analyze_in_worker(file_path) for file_path in batch]
+    finally:
+        _worker_sage.profile = None
+    return results, profile.to_dict()
+
+def _file_size(file_path):
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+def schedule_batches(file_paths, num_processes, batches_per_process=4, max_batch_files=256):
+    """Group files into batches of similar total size, largest files first.
+
+    Files bigger than the per-batch budget get a batch of their own and are
+    handed out first, so one huge file cannot hold back a chunk of small
+    ones; the small files at the tail are packed together to keep
+    per-task overhead low.
+    """
+    sized = sorted(((_file_size(file_path), file_path) for file_path in file_paths),
+                   key=lambda item: item[0], reverse=True)
+    total = sum(size for size, _ in sized)
+    budget = max(1, total // max(1, num_processes * batches_per_process))
+    batches = []
+    batch, batch_size = [], 0
+    for size, file_path in sized:
+        if batch and (batch_size + size > budget or len(batch) >= max_batch_files):
+            batches.append(batch)
+            batch, batch_size = [], 0
+        batch.append(file_path)
+        batch_size += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+def iter_analyze_files_parallel(file_paths, config, num_processes=None, profile=None):
+    """Yield ``(file_path, result)`` pairs as soon as each batch finishes.
+
+    Work is scheduled largest file first (see schedule_batches), so results
+    arrive in completion order rather than input order.
+    """
     if num_processes is None:
         num_processes = multiprocessing.cpu_count()
+    batches = schedule_batches(file_paths, num_processes)
+    if not batches:
+        return
+
+    with multiprocessing.Pool(processes=min(num_processes, len(batches)), initializer=_init_worker,
+                              initargs=(config, profile is not None)) as pool:
+        for results, stats in pool.imap_unordered(_analyze_batch_in_worker, batches):
+            if stats is not None:
+                profile.merge(stats)
+            yield from results
+
+def analyze_files_parallel(file_paths, config, num_processes=None, pool=None, profile=None):
+    """Analyze files across worker processes and return results in input order.
+
+    When a profiling.Profile is given, each worker records its own stats
+    and they are merged into ``profile`` as results come back, also when
+    the files run on an AnalysisPool passed as ``pool``.
+    """
+    if pool is not None:
+        return pool.analyze(file_paths, profile)
+
+    file_paths = list(file_paths)
+    results = dict(iter_analyze_files_parallel(file_paths, config, num_processes, profile))
+    return {file_path: results[file_path] for file_path in file_paths}
+
+def analyze_sources_parallel(sources, config, num_processes=None, pool=None):
+    """Like analyze_files_parallel, for in-memory ``(filename, source)`` pairs."""
+    if pool is not None:
+        return pool.analyze_sources(sources)
+
+    if num_processes is None:
+        num_processes = multiprocessing.cpu_count()
+
+    with multiprocessing.Pool(processes=num_processes, initializer=_init_worker,
+                              initargs=(config,)) as pool:
+        results = pool.map(_analyze_source_in_worker, sources)
+
+    return dict(results)
+
+
+class PoolBusyError(RuntimeError):
+    """Raised when the analysis queue stays full for longer than allowed."""
+
+
+class AnalysisPool:
+    """A long-lived worker pool that is reused across analysis requests.
+
+    The config is shipped to each worker once, when the worker starts, and
+    each worker builds a single analyzer that it reuses for every file.
+    At most ``max_pending`` files may be queued or running at a time;
+    callers wait up to ``queue_timeout`` seconds for a free slot before
+    ``PoolBusyError`` is raised.
+    """
+
+    def __init__(self, config, num_processes=None, max_pending=None, queue_timeout=30):
+        if num_processes is None:
+            num_processes = multiprocessing.cpu_count()
+        if max_pending is None:
+            max_pending = num_processes * 4
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._closed = False
+        self._pool = multiprocessing.Pool(processes=num_processes, initializer=_init_worker,
+                                          initargs=(config,))
+
+    def _release(self, _result):
+        self._slots.release()
+
+    def analyze(self, file_paths, profile=None):
+        """Analyze files by path; with a profiling.Profile, merge their stats into it."""
+        if profile is None:
+            return self._run(_analyze_in_worker, file_paths)
+        results = {}
+        for file_path, (result, stats) in self._run(_analyze_profiled_in_worker, file_paths).items():
+            profile.merge(stats)
+            results[file_path] = result
+        return results
+
+    def analyze_sources(self, sources):
+        """Analyze ``(filename, source)`` pairs without touching disk."""
+        return self._run(_analyze_source_in_worker, sources)
+
+    def _run(self, func, items):
+        if self._closed:
+            raise RuntimeError("AnalysisPool has been shut down")
+        pending = []
+        for item in items:
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                raise PoolBusyError("Analysis queue is full")
+            pending.append(self._pool.apply_async(func, (item,),
+                                                  callback=self._release,
+                                                  error_callback=self._release))
+        return dict(result.get() for result in pending)
+
+    def iter_analyze_sources(self, sources, wait=False):
+        """Yield ``(filename, result)`` for each source as soon as it is analyzed.
+
+        A file whose analysis raised comes back with the exception as its
+        result, and the other files carry on. With ``wait`` set, free slots
+        are waited for however long it takes instead of raising
+        PoolBusyError after ``queue_timeout``.
+        """
+        if self._closed:
+            raise RuntimeError("AnalysisPool has been shut down")
+        finished = queue.Queue()
+        timeout = None if wait else self.queue_timeout
+
+        def done(result):
+            self._slots.release()
+            finished.put(result)
+
+        def failed(filename):
+            return lambda error: done((filename, error))
+
+        submitted = received = 0
+        for item in sources:
+            if not self._slots.acquire(timeout=timeout):
+                raise PoolBusyError("Analysis queue is full")
+            self._pool.apply_async(_analyze_source_in_worker, (item,),
+                                   callback=done, error_callback=failed(item[0]))
+            submitted += 1
+            # Hand back what has finished while the rest is still being queued
+            while not finished.empty():
+                yield finished.get(False)
+                received += 1
+        while received < submitted:
+            yield finished.get()
+            received += 1
+
+    def shutdown(self):
+        """Stop accepting work and wait for queued files to finish."""
+        if self._closed:
+            return
+        self._closed = True
+        self._pool.close()
+        self._pool.join()
+
+
+class CachedPool:
+    """Answers sources seen before from ``cache`` and sends the rest to ``pool``.
+
+    Sources are keyed by the SHA-256 of their bytes in ``namespace``, which
+    should name the CodeSage version and config fingerprint the pool
+    analyzes with; ``cache`` is a ``get``/``put`` backend such as
+    cache.WarmCache. Offers the analysis methods of AnalysisPool.
+    """
+
+    def __init__(self, pool, cache, namespace=''):
+        self.pool = pool
+        self.cache = cache
+        self._keys = ResultCache(None, namespace)
+
+    def analyze_sources(self, sources):
+        sources = list(sources)
+        results = dict(self.iter_analyze_sources(sources))
+        for result in results.values():
+            if isinstance(result, Exception):
+                raise result
+        return {filename: results[filename] for filename, _ in sources}
+
+    def iter_analyze_sources(self, sources, wait=False):
+        """Yield cached results first, then the others as the pool finishes them.
 
-    with multiprocessing.Pool(processes=num_processes) as pool:
-        results = pool.map(partial(analyze_file_wrapper, config), file_paths)
+        Failed analyses are passed on as AnalysisPool yields them and are
+        not cached.
+        """
+        misses = []
+        keys = {}
+        # key -> filenames of the other uploads with the same content
+        duplicates = {}
+        for filename, source in sources:
+            key = self._keys.key(source)
+            if key in duplicates:
+                duplicates[key].append(filename)
+                continue
+            records = self.cache.get(key)
+            if records is None:
+                misses.append((filename, source))
+                keys[filename] = key
+                duplicates[key] = []
+            else:
+                yield filename, FileResult.from_records(filename, records)
+        if not misses:
+            return
+        for filename, result in self.pool.iter_analyze_sources(misses, wait):
+            key = keys[filename]
+            if not isinstance(result, Exception):
+                self.cache.put(key, result.to_records())
+            yield filename, result
+            for duplicate in duplicates[key]:
+                yield duplicate, result if isinstance(result, Exception) else FileResult(duplicate, result)
 
-    return dict(results)
\ No newline at end of file
+    def shutdown(self):
+        self.pool.shutdown()
@@ -0,0 +1,64 @@
+"""Per-rule and per-file timing counters.
+
+A ``Profile`` is handed to the analyzers, which record how long each rule
+ran, how many nodes it was given and how many issues it reported, plus the
+same totals per file. Profiles are plain counters, so stats gathered in
+worker processes can be shipped back as dicts and merged.
+"""
+PARSE = '<parse>'
+
+
+class Profile:
+    def __init__(self):
+        # name -> [seconds, nodes, issues]
+        self.rules = {}
+        self.files = {}
+
+    @staticmethod
+    def _add(table, name, seconds, nodes, issues):
+        entry = table.get(name)
+        if entry is None:
+            table[name] = [seconds, nodes, issues]
+        else:
+            entry[0] += seconds
+            entry[1] += nodes
+            entry[2] += issues
+
+    def add_rule(self, name, seconds, nodes=0, issues=0):
+        self._add(self.rules, name, seconds, nodes, issues)
+
+    def add_file(self, path, seconds, nodes=0, issues=0):
+        self._add(self.files, path, seconds, nodes, issues)
+
+    def merge(self, other):
+        """Fold another Profile, or its ``to_dict()``, into this one."""
+        if isinstance(other, Profile):
+            other = other.to_dict()
+        for name, entry in other['rules'].items():
+            self.add_rule(name, entry['seconds'], entry['nodes'], entry['issues'])
+        for path, entry in other['files'].items():
+            self.add_file(path, entry['seconds'], entry['nodes'], entry['issues'])
+        return self
+
+    def to_dict(self):
+        def table(entries):
+            return {name: {"seconds": seconds, "nodes": nodes, "issues": issues}
+                    for name, (seconds, nodes, issues) in entries.items()}
+        return {"rules": table(self.rules), "files": table(self.files)}
+
+    def dump(self, path):
+        import json
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def format_report(self, top=10):
+        lines = []
+        for title, table in (("Slowest rules", self.rules), ("Slowest files", self.files)):
+            total = sum(entry[0] for entry in table.values())
+            lines.append(f"{title} (total {total * 1000:.1f} ms):")
+            ranked = sorted(table.items(), key=lambda item: item[1][0], reverse=True)[:top]
+            for name, (seconds, nodes, issues) in ranked:
+                lines.append(f"  {seconds * 1000:10.1f} ms  {nodes:9d} nodes  {issues:7d} issues  {name}")
+            lines.append("")
+        return "\n".join(lines)
@@ -0,0 +1,128 @@
+"""Result objects returned by the analyzers."""
+from collections.abc import Mapping
+
+# Issue code -> (issue type, message template). Messages are only rendered
+# when a reporter asks for them.
+MESSAGES = {
+    'function_length': ("function_length",
+                        "Function '{0}' is too long ({1} lines). Consider breaking it down."),
+    'variable_naming': ("variable_naming",
+                        "Variable '{0}' should be in lowercase with words separated by underscores."),
+    'import_style': ("import_style",
+                     "Avoid using 'from module import *'. It's better to import specific names."),
+    'mccabe_complexity': ("complexity", "Function '{0}' is too complex (complexity: {1})"),
+    'complexity': ("complexity",
+                   "Function '{0}' is too complex (complexity: {1}). Consider refactoring."),
+    'missing_docstring': ("missing_docstring", "{0} '{1}' is missing a docstring."),
+    'line_length': ("line_length", "Line is too long ({0} > {1} characters)"),
+    'function_naming': ("function_naming", "Function name '{0}' should use snake_case"),
+    'class_naming': ("class_naming", "Class name '{0}' should use CamelCase"),
+    'syntax_error': ("syntax_error", "SyntaxError: {0}"),
+    'decode_error': ("decode_error", "Could not decode source: {0}"),
+}
+
+ISSUE_KEYS = ('type', 'message', 'line')
+
+
+class Issue(Mapping):
+    """A single finding: an issue code, its position and message arguments.
+
+    Issues read like the ``{"type", "message", "line"}`` dicts reporters
+    expect, both as a mapping (``issue['message']``) and through
+    attributes (``issue.message``), but the message text is only built
+    when it is asked for.
+    """
+
+    __slots__ = ('rule', 'line', 'col', 'args')
+
+    def __init__(self, rule, line, col=0, args=()):
+        self.rule = rule
+        self.line = line
+        self.col = col
+        self.args = args
+
+    @property
+    def type(self):
+        return MESSAGES[self.rule][0]
+
+    @property
+    def message(self):
+        return MESSAGES[self.rule][1].format(*self.args)
+
+    def __getitem__(self, key):
+        if key == 'type':
+            return self.type
+        if key == 'message':
+            return self.message
+        if key == 'line':
+            return self.line
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(ISSUE_KEYS)
+
+    def __len__(self):
+        return len(ISSUE_KEYS)
+
+    def __eq__(self, other):
+        if isinstance(other, Issue):
+            return self.to_record() == other.to_record()
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash((self.rule, self.line, self.col, self.args))
+
+    def __repr__(self):
+        return f"Issue({self.rule!r}, {self.line!r}, {self.col!r}, {self.args!r})"
+
+    def to_dict(self):
+        return {"type": self.type, "message": self.message, "line": self.line}
+
+    def to_record(self):
+        """Compact, JSON-friendly form used for caching."""
+        return [self.rule, self.line, self.col, list(self.args)]
+
+    @classmethod
+    def from_record(cls, record):
+        rule, line, col, args = record
+        return cls(rule, line, col, tuple(args))
+
+
+class FileResult(list):
+    """The issues found in one file.
+
+    A plain list of issues tagged with the path they belong to, so it can
+    be iterated and pickled like the lists the analyzers used to return.
+    Each analysis call builds a new one; analyzers keep no results of
+    their own between files.
+    """
+
+    __slots__ = ('path',)
+
+    def __init__(self, path, issues=()):
+        super().__init__(issues)
+        self.path = path
+
+    def __repr__(self):
+        return f"FileResult({self.path!r}, {list.__repr__(self)})"
+
+    @property
+    def issues(self):
+        return self
+
+    def to_dicts(self):
+        return [issue.to_dict() for issue in self]
+
+    def to_records(self):
+        return [issue.to_record() for issue in self]
+
+    @classmethod
+    def from_records(cls, path, records):
+        return cls(path, [Issue.from_record(record) for record in records])
+
+
+def issue_to_json(obj):
+    """``default`` hook for json.dump(s) so results serialize as before."""
+    if isinstance(obj, Issue):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
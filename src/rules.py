@@ -0,0 +1,457 @@
+"""Rule engine shared by the CodeSage analyzers.
+
+Every check is a small ``Rule`` that declares the AST node types it wants
+to see. ``RuleEngine`` walks a parsed tree exactly once, in the same
+breadth-first order as ``ast.walk``, and hands each node to the rules
+registered for its type. Issues are collected per rule and concatenated in
+rule order, so the output matches running the checks one after another.
+
+When given the ``ChangedLines`` of a diff, the engine only descends into
+code that overlaps a change (plus the whole body of any touched function,
+which complexity needs). Line-scoped rules then keep issues on changed
+lines only, and node-scoped rules keep issues for touched definitions,
+matched by the node each issue was reported for.
+"""
+import ast
+import re
+import unicodedata
+from collections import deque
+from time import perf_counter
+
+try:
+    from .results import Issue
+except ImportError:
+    from results import Issue
+
+SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def node_span(node):
+    """First and last line of ``node``, counting decorators, or None."""
+    start = getattr(node, 'lineno', None)
+    if start is None:
+        return None
+    for decorator in getattr(node, 'decorator_list', ()):
+        start = min(start, decorator.lineno)
+    return start, getattr(node, 'end_lineno', None) or node.lineno
+
+
+class Rule:
+    """Base class for a single check."""
+
+    name = None
+    node_types = ()
+    # 'line' rules report on a single source line, 'node' rules on a whole
+    # function, class or module; this decides how diff filtering applies.
+    target = 'line'
+    # Set by the engine for each run: the ChangedLines being analyzed, or None.
+    changed = None
+    # Set by the engine when analyzing a diff: id(issue) -> node it is about.
+    owners = None
+
+    def __init__(self, config):
+        self.config = config
+
+    def start(self):
+        """Reset any per-tree state before a run."""
+
+    def visit(self, node, scope, issues):
+        """Inspect ``node``; ``scope`` holds the enclosing definitions."""
+
+    def check_source(self, content, issues):
+        """Inspect the raw source text of the file."""
+
+    def finish(self, issues):
+        """Report anything that needs the whole tree to have been seen."""
+
+    def report(self, issues, node, issue):
+        """Add ``issue`` about ``node``; node-scoped rules report through
+        here so a diff's issues can be kept per touched definition."""
+        issues.append(issue)
+        if self.owners is not None and node is not None:
+            self.owners[id(issue)] = node
+
+
+class RuleEngine:
+    """Runs a list of rules over a tree in a single traversal."""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.dispatch = self._build_dispatch([rule.visit for rule in self.rules])
+        # Which rules look at the source text through check_source
+        self.reads_source = [type(rule).check_source is not Rule.check_source for rule in self.rules]
+        # Number of nodes the most recent run traversed.
+        self.last_node_count = 0
+
+    def _build_dispatch(self, visitors):
+        dispatch = {}
+        for index, rule in enumerate(self.rules):
+            for node_type in rule.node_types:
+                dispatch.setdefault(node_type, []).append((visitors[index], index))
+        return dispatch
+
+    def run(self, tree, content=None, changed=None, profile=None):
+        buckets = [[] for _ in self.rules]
+        for rule in self.rules:
+            rule.changed = changed
+            rule.owners = {} if changed is not None and rule.target == 'node' else None
+            rule.start()
+
+        if profile is None:
+            dispatch = self.dispatch
+        else:
+            timings = [[0.0, 0] for _ in self.rules]
+            dispatch = self._build_dispatch([_timed(rule.visit, timing)
+                                             for rule, timing in zip(self.rules, timings)])
+
+        if changed is None:
+            self.last_node_count = self._walk(tree, buckets, dispatch)
+        else:
+            self.last_node_count, touched = self._walk_changed(tree, buckets, dispatch, changed)
+
+        for index, rule in enumerate(self.rules):
+            if profile is not None:
+                started = perf_counter()
+            if content is not None and self.reads_source[index]:
+                if not isinstance(content, str):
+                    # A source_reader.SourceText, decoded on first use
+                    content = content.text
+                rule.check_source(content, buckets[index])
+            rule.finish(buckets[index])
+            if profile is not None:
+                timings[index][0] += perf_counter() - started
+
+        issues = []
+        if changed is not None:
+            touched_lines = set(touched.values())
+        for index, bucket in enumerate(buckets):
+            if changed is not None:
+                owners = self.rules[index].owners
+                if owners is not None:
+                    kept = []
+                    for issue in bucket:
+                        owner = owners.get(id(issue))
+                        if owner is not None:
+                            hit = id(owner) in touched
+                        else:
+                            # Issues reported without their node are matched by line
+                            hit = issue.line in touched_lines
+                        if hit or issue.line in changed:
+                            kept.append(issue)
+                    bucket = kept
+                    self.rules[index].owners = None
+                else:
+                    bucket = [issue for issue in bucket if issue.line in changed]
+            if profile is not None:
+                seconds, nodes = timings[index]
+                profile.add_rule(self.rules[index].name, seconds, nodes, len(bucket))
+            issues.extend(bucket)
+        return issues
+
+    def _walk(self, tree, buckets, dispatch):
+        visited = 0
+        queue = deque([(tree, ())] if tree is not None else ())
+        while queue:
+            node, scope = queue.popleft()
+            visited += 1
+            handlers = dispatch.get(type(node))
+            if handlers:
+                for visit, index in handlers:
+                    visit(node, scope, buckets[index])
+            child_scope = scope + (node,) if isinstance(node, SCOPE_NODES) else scope
+            for child in ast.iter_child_nodes(node):
+                queue.append((child, child_scope))
+        return visited
+
+    def _walk_changed(self, tree, buckets, dispatch, changed):
+        """Walk only the parts of ``tree`` that a diff touched.
+
+        Returns the number of nodes visited and the definitions that
+        overlap a change, as a dict of ``id(node)`` to first line.
+        """
+        visited = 0
+        touched = {}
+        queue = deque([(tree, (), False)] if tree is not None else ())
+        while queue:
+            node, scope, whole = queue.popleft()
+            span = node_span(node)
+            overlaps = span is None or changed.overlaps(*span)
+            if not (whole or overlaps):
+                continue
+            visited += 1
+            if isinstance(node, SCOPE_NODES):
+                if overlaps:
+                    touched[id(node)] = node.lineno
+                    whole = whole or isinstance(node, FUNCTION_NODES)
+                child_scope = scope + (node,)
+            else:
+                child_scope = scope
+            handlers = dispatch.get(type(node))
+            if handlers:
+                for visit, index in handlers:
+                    visit(node, scope, buckets[index])
+            for child in ast.iter_child_nodes(node):
+                queue.append((child, child_scope, whole))
+        return visited, touched
+
+
+def _timed(visit, timing):
+    """Wrap a rule's visit so its time and node count land in ``timing``."""
+    def timed_visit(node, scope, issues):
+        started = perf_counter()
+        visit(node, scope, issues)
+        timing[0] += perf_counter() - started
+        timing[1] += 1
+    return timed_visit
+
+
+class FunctionLengthRule(Rule):
+    name = "function_length"
+    target = 'node'
+    node_types = (ast.FunctionDef,)
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.max_length = config.get('max_function_length', 20)
+
+    def visit(self, node, scope, issues):
+        if len(node.body) > self.max_length:
+            self.report(issues, node, Issue('function_length', node.lineno, node.col_offset,
+                                            (node.name, len(node.body))))
+
+
+class VariableNamingRule(Rule):
+    name = "variable_naming"
+    node_types = (ast.Name,)
+
+    def visit(self, node, scope, issues):
+        if not node.id.islower():
+            issues.append(Issue('variable_naming', node.lineno, node.col_offset, (node.id,)))
+
+
+class ImportStyleRule(Rule):
+    name = "import_style"
+    node_types = (ast.Import, ast.ImportFrom)
+
+    def visit(self, node, scope, issues):
+        if any('*' in alias.name for alias in node.names):
+            issues.append(Issue('import_style', node.lineno, node.col_offset))
+
+
+class McCabeComplexityRule(Rule):
+    """McCabe complexity, computed by mccabe's own path-graph builder.
+
+    The graph builder needs its own statement-level visit, so the rule runs
+    it once from the module node rather than re-walking the tree per
+    function.
+    """
+
+    name = "complexity"
+    target = 'node'
+    node_types = (ast.Module,)
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.max_complexity = config.get('max_complexity', 10)
+
+    def visit(self, node, scope, issues):
+        from mccabe import PathGraphingAstVisitor
+
+        visitor = PathGraphingAstVisitor()
+        functions = {}
+        if self.changed is None:
+            visitor.preorder(node, visitor)
+        else:
+            # Only build graphs for the top-level statements a diff touched
+            for statement in node.body:
+                span = node_span(statement)
+                if span is not None and self.changed.overlaps(*span):
+                    visitor.preorder(statement, visitor)
+                    # Graphs only know where their function starts
+                    functions.update(((child.lineno, child.col_offset), child)
+                                     for child in ast.walk(statement) if isinstance(child, FUNCTION_NODES))
+        for graph in visitor.graphs.values():
+            complexity = graph.complexity()
+            if complexity > self.max_complexity:
+                self.report(issues, functions.get((graph.lineno, graph.column)),
+                            Issue('mccabe_complexity', graph.lineno, graph.column,
+                                  (graph.entity, complexity)))
+
+
+class BranchComplexityRule(Rule):
+    """Counts branch points inside each function.
+
+    A branch node adds one to every enclosing function, which gives the same
+    totals as walking each function's subtree separately.
+    """
+
+    name = "complexity"
+    target = 'node'
+    node_types = (ast.FunctionDef, ast.If, ast.While, ast.For,
+                  ast.comprehension, ast.Try, ast.ExceptHandler)
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.max_complexity = config.get('max_complexity', 10)
+
+    def start(self):
+        self.functions = []
+        self.counts = {}
+
+    def visit(self, node, scope, issues):
+        counts = self.counts
+        if type(node) is ast.FunctionDef:
+            self.functions.append(node)
+            counts[node] = 1
+            return
+        for outer in scope:
+            if outer in counts:
+                counts[outer] += 1
+
+    def finish(self, issues):
+        for node in self.functions:
+            complexity = self.counts[node]
+            if complexity > self.max_complexity:
+                self.report(issues, node, Issue('complexity', node.lineno, node.col_offset,
+                                                (node.name, complexity)))
+        self.functions = []
+        self.counts = {}
+
+
+class DocstringRule(Rule):
+    name = "missing_docstring"
+    target = 'node'
+    node_types = (ast.FunctionDef, ast.ClassDef, ast.Module)
+    kinds = {ast.FunctionDef: 'Function', ast.ClassDef: 'Class', ast.Module: 'Module'}
+
+    def visit(self, node, scope, issues):
+        if not ast.get_docstring(node):
+            kind = self.kinds[type(node)]
+            if isinstance(node, ast.Module):
+                self.report(issues, node, Issue('missing_docstring', 1, 0, (kind, 'module')))
+            else:
+                self.report(issues, node, Issue('missing_docstring', node.lineno, node.col_offset,
+                                                (kind, node.name)))
+
+
+def _skip_lines(content, position, count):
+    """The start of the line ``count`` lines after the one at ``position``,
+    or -1 if ``content`` has fewer lines.
+
+    Newlines are counted in chunks and the chunk holding the line is
+    bisected, so skipping many lines costs a few ``str.count`` calls.
+    """
+    size = len(content)
+    while count > 0:
+        end = min(position + 65536, size)
+        found = content.count('\n', position, end)
+        if found < count:
+            if end == size:
+                return -1
+            count -= found
+            position = end
+            continue
+        while end - position > 64:
+            middle = (position + end) // 2
+            found = content.count('\n', position, middle)
+            if found >= count:
+                end = middle
+            else:
+                count -= found
+                position = middle
+        while count > 0:
+            position = content.find('\n', position) + 1
+            count -= 1
+    return position
+
+
+def _display_width(line, tab_size, east_asian_width):
+    """Number of columns ``line`` takes up in a terminal."""
+    if tab_size and '\t' in line:
+        line = line.expandtabs(tab_size)
+    if east_asian_width and not line.isascii():
+        return sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in line)
+    return len(line)
+
+
+class LineLengthRule(Rule):
+    """Lines wider than ``max_line_length`` columns.
+
+    The source is never split into lines: a regex anchored at line starts
+    only matches lines with enough characters to possibly be too wide, so
+    short lines cost nothing. With changed lines, only their spans are
+    scanned. ``line_length_tab_size`` expands tabs to
+    that many columns and ``line_length_east_asian_width`` counts wide
+    characters as two columns. A trailing ``\r`` is not counted.
+    """
+    name = "line_length"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.max_line_length = config.get('max_line_length', 79)
+        self.tab_size = config.get('line_length_tab_size')
+        self.east_asian_width = config.get('line_length_east_asian_width', False)
+        # The most columns a single character can take up
+        widest = max(self.tab_size or 1, 2 if self.east_asian_width else 1)
+        self.counts_characters = widest == 1
+        # Whole lines with enough characters to possibly be too wide
+        self.candidate = re.compile('^.{%d,}$' % (max(self.max_line_length, 0) // widest + 1),
+                                    re.MULTILINE)
+
+    def check_source(self, content, issues):
+        if self.changed is None:
+            self._check_span(content, 1, 0, len(content), issues)
+            return
+        # Only the changed line spans are scanned
+        lineno = 1
+        position = 0
+        for first, last in zip(self.changed.starts, self.changed.ends):
+            start = _skip_lines(content, position, first - lineno)
+            if start < 0:
+                break
+            position = _skip_lines(content, start, last - first + 1)
+            lineno = last + 1
+            end = len(content) if position < 0 else position - 1
+            self._check_span(content, first, start, end, issues)
+            if position < 0:
+                break
+
+    def _check_span(self, content, lineno, pos, endpos, issues):
+        """Check the lines from ``pos``, the start of line ``lineno``, to ``endpos``."""
+        max_line_length = self.max_line_length
+        position = pos
+        for match in self.candidate.finditer(content, pos, endpos):
+            start, end = match.span()
+            lineno += content.count('\n', position, start)
+            position = start
+            if content[end - 1] == '\r':
+                end -= 1
+            if self.counts_characters:
+                width = end - start
+            else:
+                width = _display_width(content[start:end], self.tab_size, self.east_asian_width)
+            if width > max_line_length:
+                issues.append(Issue('line_length', lineno, 0, (width, max_line_length)))
+
+
+class FunctionNamingRule(Rule):
+    name = "function_naming"
+    target = 'node'
+    node_types = (ast.FunctionDef,)
+    pattern = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+    def visit(self, node, scope, issues):
+        if not self.pattern.match(node.name):
+            self.report(issues, node, Issue('function_naming', node.lineno, node.col_offset, (node.name,)))
+
+
+class ClassNamingRule(Rule):
+    name = "class_naming"
+    target = 'node'
+    node_types = (ast.ClassDef,)
+    pattern = re.compile(r'^[A-Z][a-zA-Z0-9]*$')
+
+    def visit(self, node, scope, issues):
+        if not self.pattern.match(node.name):
+            self.report(issues, node, Issue('class_naming', node.lineno, node.col_offset, (node.name,)))
@@ -0,0 +1,87 @@
+"""Helpers for reading Python source and turning it into text the analyzers can use.
+
+Files are read as bytes, or memory-mapped once they are large, and handed
+to ``ast.parse`` as they are, so the parser applies PEP 263 coding cookies
+and BOMs itself and no decoded copy is made. Text is only decoded when a
+line-based check asks for it.
+"""
+import io
+import mmap
+import os
+import tokenize
+from contextlib import contextmanager
+
+# Files at least this large are memory-mapped instead of read into memory.
+MMAP_THRESHOLD = 1024 * 1024
+
+
+def _universal_newlines(text):
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def decode_source(source):
+    """Return ``source`` as text, decoding bytes the way Python would.
+
+    Bytes are decoded with the encoding named by their PEP 263 coding
+    cookie or BOM, falling back to UTF-8, and newlines are translated as
+    ``open()`` does in text mode. Text is returned unchanged.
+    """
+    if isinstance(source, str):
+        return source
+    if isinstance(source, mmap.mmap):
+        source.seek(0)
+        encoding, _ = tokenize.detect_encoding(source.readline)
+    else:
+        encoding, _ = tokenize.detect_encoding(io.BytesIO(source).readline)
+    return _universal_newlines(str(source, encoding))
+
+
+def decode_error(source):
+    """Return the error decoding ``source`` raises, or None if it decodes.
+
+    Decoding errors, including unknown coding cookies, come back as
+    ``UnicodeDecodeError`` or ``SyntaxError`` with a ``lineno`` set.
+    """
+    try:
+        decode_source(source)
+    except UnicodeDecodeError as e:
+        e.lineno = source[:e.start].count(b'\n') + 1
+        return e
+    except SyntaxError as e:
+        e.lineno = e.lineno or 1
+        return e
+    return None
+
+
+class SourceText:
+    """Raw source bytes whose decoded text is only built on first use."""
+
+    __slots__ = ('data', '_text')
+
+    def __init__(self, data):
+        self.data = data
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = decode_source(self.data)
+        return self._text
+
+
+@contextmanager
+def open_source(path, mmap_threshold=MMAP_THRESHOLD):
+    """Yield the raw bytes of ``path``; large files come as a read-only mmap.
+
+    A mapping is closed when the block exits, so results must not keep
+    references to it.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < mmap_threshold or size == 0:
+            yield f.read()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
@@ -0,0 +1,265 @@
+"""Local SQLite history of analysis runs.
+
+Every run records which files it saw and the issues found in each, along
+with the commit SHA, config hash, CodeSage version and timestamps. The
+issues of a file are stored once per git blob hash and config, so a file
+whose content was already analyzed under the same config is read back
+from the store instead of being analyzed again.
+
+Queries from the command line::
+
+    python src/store.py results.db --runs
+    python src/store.py results.db --top-rules [--run RUN]
+    python src/store.py results.db --new-since RUN [--run RUN]
+
+``--run`` defaults to the latest run.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+try:
+    from .source_reader import open_source
+    from .results import Issue
+except ImportError:
+    from source_reader import open_source
+    from results import Issue
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    commit_sha TEXT,
+    config_hash TEXT NOT NULL,
+    version TEXT NOT NULL,
+    root TEXT
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    blob_hash TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    version TEXT NOT NULL,
+    UNIQUE (blob_hash, config_hash, version)
+);
+CREATE TABLE IF NOT EXISTS files (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    path TEXT NOT NULL,
+    analysis_id INTEGER NOT NULL REFERENCES analyses (id),
+    PRIMARY KEY (run_id, path)
+);
+CREATE TABLE IF NOT EXISTS issues (
+    analysis_id INTEGER NOT NULL REFERENCES analyses (id),
+    rule TEXT NOT NULL,
+    line INTEGER,
+    col INTEGER,
+    args TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_path ON files (path);
+CREATE INDEX IF NOT EXISTS files_analysis ON files (analysis_id);
+CREATE INDEX IF NOT EXISTS issues_analysis ON issues (analysis_id);
+CREATE INDEX IF NOT EXISTS issues_rule ON issues (rule);
+"""
+
+
+def blob_hash(data):
+    """The hash git gives a blob with this content."""
+    digest = hashlib.sha1(b'blob %d\0' % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def current_commit(path):
+    """HEAD of the git work tree holding ``path``, or None outside one."""
+    directory = path if os.path.isdir(path) else os.path.dirname(path) or os.curdir
+    try:
+        result = subprocess.run(["git", "-C", directory, "rev-parse", "HEAD"],
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class ResultStore:
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        # Let dashboards read while a run is being written
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def begin_run(self, config_hash, version, commit_sha=None, root=None, reuse=True, config_for=None):
+        """Start recording a run; returns a RunRecorder for ``analyze_paths``.
+
+        ``config_for`` maps a file to the config in effect for it, when
+        that may differ from the run's (see ``config.ConfigResolver``).
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (started_at, commit_sha, config_hash, version, root) VALUES (?, ?, ?, ?, ?)",
+                (time.time(), commit_sha, config_hash, version, root))
+        return RunRecorder(self, cursor.lastrowid, config_hash, version, reuse, config_for)
+
+    def runs(self):
+        """``(id, started_at, finished_at, commit_sha, config_hash, version, root)`` rows, oldest first."""
+        return self.connection.execute(
+            "SELECT id, started_at, finished_at, commit_sha, config_hash, version, root"
+            " FROM runs ORDER BY id").fetchall()
+
+    def latest_run(self):
+        row = self.connection.execute(
+            "SELECT MAX(id) FROM runs WHERE finished_at IS NOT NULL").fetchone()
+        return row[0]
+
+    def run_issues(self, run_id):
+        """``(path, Issue)`` pairs recorded for a run, by path and line."""
+        rows = self.connection.execute(
+            "SELECT files.path, issues.rule, issues.line, issues.col, issues.args"
+            " FROM files JOIN issues ON issues.analysis_id = files.analysis_id"
+            " WHERE files.run_id = ? ORDER BY files.path, issues.line, issues.rowid", (run_id,))
+        return [(path, Issue(rule, line, col, tuple(json.loads(args))))
+                for path, rule, line, col, args in rows]
+
+    def new_issues(self, since_run, run_id=None):
+        """Issues in ``run_id`` (default: the latest) that ``since_run`` did not have.
+
+        Issues are matched on file, rule and message arguments, so ones that
+        only moved to another line are not reported as new.
+        """
+        if run_id is None:
+            run_id = self.latest_run()
+        rows = self.connection.execute(
+            "SELECT files.path, issues.rule, issues.line, issues.col, issues.args"
+            " FROM files JOIN issues ON issues.analysis_id = files.analysis_id"
+            " WHERE files.run_id = ? AND NOT EXISTS ("
+            "   SELECT 1 FROM files AS old_files"
+            "   JOIN issues AS old_issues ON old_issues.analysis_id = old_files.analysis_id"
+            "   WHERE old_files.run_id = ? AND old_files.path = files.path"
+            "   AND old_issues.rule = issues.rule AND old_issues.args = issues.args)"
+            " ORDER BY files.path, issues.line, issues.rowid", (run_id, since_run))
+        return [(path, Issue(rule, line, col, tuple(json.loads(args))))
+                for path, rule, line, col, args in rows]
+
+    def top_rules(self, run_id=None, limit=10):
+        """``(rule, count)`` for the rules with the most issues in a run."""
+        if run_id is None:
+            run_id = self.latest_run()
+        return self.connection.execute(
+            "SELECT issues.rule, COUNT(*) AS count"
+            " FROM files JOIN issues ON issues.analysis_id = files.analysis_id"
+            " WHERE files.run_id = ? GROUP BY issues.rule ORDER BY count DESC, issues.rule LIMIT ?",
+            (run_id, limit)).fetchall()
+
+
+class RunRecorder:
+    """Records one run while standing in for the cache ``analyze_paths`` uses.
+
+    Cache keys are ``(blob hash, config hash)`` pairs. ``get`` returns the
+    stored issues of a blob already analyzed under that config, unless
+    ``reuse`` is off, and ``put`` stores new ones. ``finish`` records
+    which files the run saw.
+    """
+
+    def __init__(self, store, run_id, config_hash, version, reuse=True, config_for=None):
+        self.store = store
+        self.run_id = run_id
+        self.config_hash = config_hash
+        self.version = version
+        self.reuse = reuse
+        self.config_for = config_for
+        self._keys = {}
+        self._analysis_ids = {}
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def key_for_file(self, file_path):
+        with open_source(file_path) as data:
+            blob = blob_hash(data)
+        config_hash = self.config_hash
+        if self.config_for is not None:
+            config_hash = self.config_for(file_path).fingerprint
+        key = self._keys[file_path] = (blob, config_hash)
+        return key
+
+    def get(self, key):
+        row = None
+        if self.reuse:
+            row = self.store.connection.execute(
+                "SELECT id FROM analyses WHERE blob_hash = ? AND config_hash = ? AND version = ?",
+                (*key, self.version)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._analysis_ids[key] = row[0]
+        rows = self.store.connection.execute(
+            "SELECT rule, line, col, args FROM issues WHERE analysis_id = ? ORDER BY rowid", (row[0],))
+        return [[rule, line, col, json.loads(args)] for rule, line, col, args in rows]
+
+    def put(self, key, records):
+        connection = self.store.connection
+        connection.execute(
+            "DELETE FROM issues WHERE analysis_id IN (SELECT id FROM analyses"
+            " WHERE blob_hash = ? AND config_hash = ? AND version = ?)",
+            (*key, self.version))
+        connection.execute(
+            "INSERT OR IGNORE INTO analyses (blob_hash, config_hash, version) VALUES (?, ?, ?)",
+            (*key, self.version))
+        analysis_id = connection.execute(
+            "SELECT id FROM analyses WHERE blob_hash = ? AND config_hash = ? AND version = ?",
+            (*key, self.version)).fetchone()[0]
+        connection.executemany(
+            "INSERT INTO issues (analysis_id, rule, line, col, args) VALUES (?, ?, ?, ?, ?)",
+            [(analysis_id, rule, line, col, json.dumps(args)) for rule, line, col, args in records])
+        self._analysis_ids[key] = analysis_id
+        self.writes += 1
+
+    def finish(self, paths):
+        """Record the files of the run and commit it."""
+        connection = self.store.connection
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO files (run_id, path, analysis_id) VALUES (?, ?, ?)",
+                [(self.run_id, path, self._analysis_ids[self._keys[path]]) for path in paths])
+            connection.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), self.run_id))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a CodeSage results store")
+    parser.add_argument('database', help="Path of the SQLite results store")
+    parser.add_argument('--run', type=int, help="Run to report on (default: the latest)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--runs', action='store_true', help="List recorded runs")
+    group.add_argument('--top-rules', action='store_true', help="Rules with the most issues")
+    group.add_argument('--new-since', type=int, metavar='RUN', help="Issues that are new since RUN")
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.database)
+    try:
+        if args.runs:
+            for run_id, started, finished, commit_sha, config_hash, version, root in store.runs():
+                when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started))
+                state = '' if finished is not None else ' (unfinished)'
+                print(f"{run_id:5d}  {when}  {(commit_sha or '-')[:12]:12}  {config_hash[:12]}  {root}{state}")
+        elif args.top_rules:
+            for rule, count in store.top_rules(args.run):
+                print(f"{count:7d}  {rule}")
+        else:
+            for path, issue in store.new_issues(args.new_since, args.run):
+                print(f"{path}:{issue['line']}: [{issue['type']}] {issue['message']}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
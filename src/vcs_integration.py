@@ -1,34 +1,50 @@
+import argparse
 import os
-import subprocess
-from github import Github
-from main import load_config
-from enhanced_analysis import EnhancedCodeSage
-from improved_reporting import generate_detailed_report
-
-def analyze_github_pr(repo_owner, repo_name, pr_number, github_token):
-    g = Github(github_token)
-    repo = g.get_repo(f"{repo_owner}/{repo_name}")
-    pr = repo.get_pull(pr_number)
+import sys
+
+try:
+    from .main import load_config
+    from .config import Config
+    from .enhanced_analysis import EnhancedCodeSage
+    from .improved_reporting import generate_detailed_report
+    from .git_backend import GitRepository
+    from .parallel_processing import AnalysisPool
+    from .results import FileResult
+except ImportError:
+    from main import load_config
+    from config import Config
+    from enhanced_analysis import EnhancedCodeSage
+    from improved_reporting import generate_detailed_report
+    from git_backend import GitRepository
+    from parallel_processing import AnalysisPool
+    from results import FileResult
 
-    # Clone the repository
-    repo_dir = f"temp_{repo_name}"
-    subprocess.run(["git", "clone", repo.clone_url, repo_dir])
-    os.chdir(repo_dir)
+def analyze_github_pr(repo_owner, repo_name, pr_number, github_token, repo_path='.'):
+    """Analyze a GitHub pull request from an existing local clone.
 
-    # Checkout the PR branch
-    subprocess.run(["git", "fetch", "origin", f"pull/{pr_number}/head:pr_{pr_number}"])
-    subprocess.run(["git", "checkout", f"pr_{pr_number}"])
+    The PR head is fetched into ``repo_path`` if it is not there yet and
+    the changed files are read from git objects, so nothing is cloned or
+    checked out.
+    """
+    from github import Auth, Github
+
+    g = Github(auth=Auth.Token(github_token))
+    repo = g.get_repo(f"{repo_owner}/{repo_name}")
+    pr = repo.get_pull(pr_number)
 
-    # Analyze changed files
-    changed_files = pr.get_files()
+    config = load_config('config.yaml')
+    sage = EnhancedCodeSage(config)
     results = {}
-    for file in changed_files:
-        if file.filename.endswith('.py'):
-            config = load_config('../config.yaml')
-            sage = EnhancedCodeSage(config)
-            issues = sage.analyze_file(file.filename)
+    with GitRepository(repo_path) as local:
+        if not (local.has_commit(pr.head.sha) and local.has_commit(pr.base.sha)):
+            local.git("fetch", "--quiet", repo.clone_url, pr.base.ref, f"pull/{pr_number}/head")
+        base = local.merge_base(pr.base.sha, pr.head.sha)
+
+        # Analyze changed files
+        for file_path, blob in local.changed_files(base, pr.head.sha).items():
+            issues = sage.analyze_source(local.read_blob(blob), file_path)
             if issues:
-                results[file.filename] = issues
+                results[file_path] = issues
 
     # Generate report
     report = generate_detailed_report(results)
@@ -36,8 +52,119 @@ def analyze_github_pr(repo_owner, repo_name, pr_number, github_token):
     # Post report as a comment on the PR
     pr.create_issue_comment(f"CodeSage Analysis Results:\n\n```html\n{report}\n```")
 
-    # Clean up
-    os.chdir('..')
-    subprocess.run(["rm", "-rf", repo_dir])
+    return results
+
+def analyze_github_prs(repo_owner, repo_name, pr_numbers, github_token, repo_path='.',
+                       config=None, base_url=None, num_processes=None, pool=None, cache=None,
+                       post_comments=True):
+    """Analyze many pull requests of one repository in a single pass.
+
+    One API client (and its pooled HTTP connections) serves every PR, the
+    missing PR heads are fetched with one ``git fetch``, and each distinct
+    file version is analyzed once: results are kept in ``cache`` under the
+    blob SHA and config fingerprint, so a file that several PRs share, or
+    that an earlier batch already saw when the same ``cache`` dict is
+    passed again, is not analyzed twice. A blob is analyzed under the
+    first path it has in the batch. Analysis runs on ``pool``, or on an
+    AnalysisPool started for the batch. Returns ``{pr_number: results}``.
+    """
+    from github import Auth, Github
+
+    if config is None:
+        config = load_config('config.yaml')
+    fingerprint = config.fingerprint if isinstance(config, Config) else Config(config).fingerprint
+    if cache is None:
+        cache = {}
+
+    options = {} if base_url is None else {'base_url': base_url}
+    g = Github(auth=Auth.Token(github_token), **options)
+    repo = g.get_repo(f"{repo_owner}/{repo_name}")
+    pulls = [repo.get_pull(pr_number) for pr_number in pr_numbers]
+
+    changed = {}
+    with GitRepository(repo_path) as local:
+        missing = [pr for pr in pulls
+                   if not (local.has_commit(pr.head.sha) and local.has_commit(pr.base.sha))]
+        if missing:
+            refs = list(dict.fromkeys(pr.base.ref for pr in missing))
+            refs += [f"pull/{pr.number}/head" for pr in missing]
+            local.git("fetch", "--quiet", repo.clone_url, *refs)
+        for pr in pulls:
+            base = local.merge_base(pr.base.sha, pr.head.sha)
+            changed[pr.number] = local.changed_files(base, pr.head.sha)
+
+        # blob -> the path it is analyzed under
+        pending = {}
+        for files in changed.values():
+            for file_path, blob in files.items():
+                if (blob, fingerprint) not in cache:
+                    pending.setdefault(blob, file_path)
+        if pending:
+            own_pool = pool is None
+            if own_pool:
+                pool = AnalysisPool(config, num_processes)
+            try:
+                pending = list(pending.items())
+                while pending:
+                    # Results come back by path, so each round has a path
+                    # once; blobs of the same path in other PRs wait for a
+                    # later round
+                    blobs, pending = _one_per_path(pending)
+                    # Blobs are read as the pool takes them, not all up front
+                    sources = ((file_path, local.read_blob(blob)) for file_path, blob in blobs.items())
+                    for file_path, issues in pool.analyze_sources(sources).items():
+                        cache[blobs[file_path], fingerprint] = issues
+            finally:
+                if own_pool:
+                    pool.shutdown()
+
+    batch = {}
+    for pr in pulls:
+        results = {}
+        for file_path, blob in changed[pr.number].items():
+            issues = cache[blob, fingerprint]
+            if issues:
+                results[file_path] = FileResult(file_path, issues)
+        batch[pr.number] = results
+        if post_comments:
+            report = generate_detailed_report(results)
+            pr.create_issue_comment(f"CodeSage Analysis Results:\n\n```html\n{report}\n```")
+    return batch
+
+def _one_per_path(pending):
+    """Split ``(blob, path)`` pairs into ``{path: blob}`` with each path once, and the rest."""
+    blobs = {}
+    rest = []
+    for blob, file_path in pending:
+        if file_path in blobs:
+            rest.append((blob, file_path))
+        else:
+            blobs[file_path] = blob
+    return blobs, rest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a batch of GitHub pull requests")
+    parser.add_argument('repo', help="Repository as 'owner/name'")
+    parser.add_argument('pr_numbers', type=int, nargs='+', metavar='PR', help="Pull request numbers")
+    parser.add_argument('--repo-path', default='.', help="Local clone of the repository")
+    parser.add_argument('--config', default='config.yaml', help="Config file to analyze with")
+    parser.add_argument('--base-url', help="GitHub API URL, for GitHub Enterprise")
+    parser.add_argument('--processes', type=int, help="Number of worker processes")
+    parser.add_argument('--no-comment', action='store_true',
+                        help="Print the results instead of commenting on the PRs")
+    args = parser.parse_args(argv)
+
+    repo_owner, _, repo_name = args.repo.partition('/')
+    batch = analyze_github_prs(repo_owner, repo_name, args.pr_numbers, os.environ.get('GITHUB_TOKEN'),
+                               args.repo_path, load_config(args.config), args.base_url,
+                               args.processes, post_comments=not args.no_comment)
+    if args.no_comment:
+        for pr_number, results in batch.items():
+            print(f"PR #{pr_number}")
+            for file_path, issues in results.items():
+                for issue in issues:
+                    print(f"  {file_path}:{issue['line']}: [{issue['type']}] {issue['message']}")
+    return 0
 
-    return results
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())
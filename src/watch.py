@@ -0,0 +1,296 @@
+"""Incremental re-analysis of a tree as files change.
+
+``watch`` keeps every file's issues in memory and, each time files are
+saved, re-analyzes only those files and prints the issues that appeared or
+went away. Changes come from inotify on Linux and from polling
+modification times everywhere else. When a config file changes, every
+file is re-checked under the new settings.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from difflib import SequenceMatcher
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+# Extra time to wait after the first event so an editor's burst of writes
+# is handled as one change.
+SETTLE_SECONDS = 0.02
+
+
+class RescanNeeded(Exception):
+    """The watcher lost track of events; every file should be re-checked."""
+
+
+class ConfigChanged(RescanNeeded):
+    """A config file changed; every file should be re-checked with it."""
+
+
+class InotifyWatcher:
+    """Reports changed paths using Linux inotify, through libc via ctypes."""
+
+    def __init__(self, discovery, config_names=(), config_paths=()):
+        self.discovery = discovery
+        self.config_names = frozenset(config_names)
+        self.config_paths = frozenset(os.path.abspath(path) for path in config_paths)
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories = {}
+        for directory in discovery.iter_directories():
+            self._add_watch(directory)
+        # Directories outside the tree, watched only for their config files
+        self._config_only = set()
+        watched = {os.path.abspath(directory) for directory in self._directories.values()}
+        for directory in {os.path.dirname(path) for path in self.config_paths} - watched:
+            wd = self._add_watch(directory)
+            if wd >= 0:
+                self._config_only.add(wd)
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self._directories[wd] = directory
+        return wd
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def changes(self, timeout=None):
+        """Block until something changes; return the set of changed paths.
+
+        A path in the set may also be a directory that was removed, in
+        which case everything below it is gone.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        time.sleep(SETTLE_SECONDS)
+        discovery = self.discovery
+        changed = set()
+        events = self._read_events()
+        while events:
+            for wd, mask, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    raise RescanNeeded()
+                directory = self._directories.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._directories[wd]
+                    continue
+                path = os.path.join(directory, name) if name else directory
+                if name in self.config_names or (
+                        self.config_paths and os.path.abspath(path) in self.config_paths):
+                    raise ConfigChanged()
+                if wd in self._config_only:
+                    continue
+                if name == '.gitignore':
+                    discovery.reload()
+                    raise RescanNeeded()
+                if mask & (IN_ISDIR | IN_DELETE_SELF):
+                    if discovery.single_file or discovery.is_ignored(path, is_dir=True):
+                        continue
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # Files may have landed before the watch was in place
+                        changed.update(self._watch_new_directory(path))
+                    else:
+                        changed.add(path)
+                elif discovery.wants(path):
+                    changed.add(discovery.root if discovery.single_file else path)
+            events = self._read_events()
+        return changed
+
+    def _watch_new_directory(self, path):
+        """Watch ``path`` and its subdirectories; yield the files already there."""
+        discovery = self.discovery
+        for root, dirs, files in os.walk(path):
+            self._add_watch(root)
+            dirs[:] = [name for name in dirs
+                       if not discovery.is_ignored(os.path.join(root, name), is_dir=True)]
+            for name in files:
+                file_path = os.path.join(root, name)
+                if discovery.wants(file_path):
+                    yield file_path
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Reports changed paths by comparing modification times."""
+
+    def __init__(self, discovery, config_names=(), config_paths=(), interval=0.5):
+        self.discovery = discovery
+        self.config_names = tuple(config_names)
+        self.config_paths = tuple(config_paths)
+        self.interval = interval
+        self._config_paths = set()
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        paths = list(self.discovery)
+        config_paths = [os.path.join(directory, name)
+                        for directory in self.discovery.iter_directories()
+                        for name in self.config_names] if self.config_names else []
+        config_paths += self.config_paths
+        snapshot = {}
+        for path in paths + config_paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        self._config_paths.update(config_paths)
+        return snapshot
+
+    def changes(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval)
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if not changed.isdisjoint(self._config_paths):
+                raise ConfigChanged()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(discovery, config_names=(), config_paths=()):
+    """An inotify watcher where available, otherwise a polling one.
+
+    Changes to files named in ``config_names``, or to the files at
+    ``config_paths`` wherever they are, raise ConfigChanged.
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(discovery, config_names, config_paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(discovery, config_names, config_paths)
+
+
+def _issue_line(issue):
+    return issue['line'] or 0
+
+
+def diff_issues(old, new):
+    """Return ``(added, removed)`` issue lists between two results.
+
+    Issues are aligned by type and message in line order, not by line
+    number, so issues that only moved because lines were inserted or
+    removed above them are neither added nor removed.
+    """
+    old = sorted(old, key=_issue_line)
+    new = sorted(new, key=_issue_line)
+    matcher = SequenceMatcher(None, [(issue['type'], issue['message']) for issue in old],
+                              [(issue['type'], issue['message']) for issue in new], autojunk=False)
+    added = []
+    removed = []
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag != 'equal':
+            removed.extend(old[old_start:old_end])
+            added.extend(new[new_start:new_end])
+    return added, removed
+
+
+def print_issue_diff(file_path, added, removed, out=sys.stdout):
+    print(f"Changes in {file_path}:", file=out)
+    for sign, issues in (('-', removed), ('+', added)):
+        for issue in issues:
+            print(f"{sign} Line {issue['line']}: [{issue['type']}] {issue['message']}", file=out)
+    print(file=out, flush=True)
+
+
+def recheck(paths, results, analyze, discovery, out=sys.stdout):
+    """Re-analyze ``paths`` and print how their issues changed."""
+    paths = set(paths)
+    for path in list(paths):
+        if not os.path.isfile(path):
+            # A removed directory takes every known file below it along
+            prefix = os.path.join(path, '')
+            paths.update(known for known in results if known.startswith(prefix))
+    for file_path in sorted(paths):
+        if not os.path.isfile(file_path) or not discovery.wants(file_path):
+            if file_path in results:
+                _, removed = diff_issues(results.pop(file_path), [])
+                print_issue_diff(file_path, [], removed, out)
+            continue
+        try:
+            result = analyze(file_path)
+        except (SyntaxError, UnicodeDecodeError, OSError) as e:
+            print(f"Could not analyze {file_path}: {e}", file=out, flush=True)
+            continue
+        added, removed = diff_issues(results.get(file_path, []), result)
+        results[file_path] = result
+        if added or removed:
+            print_issue_diff(file_path, added, removed, out)
+
+
+def watch(discovery, analyze, results, out=sys.stdout, config_names=(), config_paths=(),
+          on_config_change=None):
+    """Watch ``discovery``'s tree and re-check files as they change.
+
+    ``analyze`` maps a path to its issues and ``results`` holds the issues
+    already known for each path; it is updated in place. When a file named
+    in ``config_names`` or one of ``config_paths`` changes,
+    ``on_config_change`` is called and every file is re-checked. Runs
+    until interrupted.
+    """
+    watcher = create_watcher(discovery, config_names, config_paths)
+    print(f"Watching {discovery.root} for changes ({type(watcher).__name__}). Press Ctrl+C to stop.",
+          file=out, flush=True)
+    try:
+        while True:
+            try:
+                changed = watcher.changes()
+            except ConfigChanged:
+                if on_config_change is not None:
+                    on_config_change()
+                changed = set(results) | set(discovery)
+            except RescanNeeded:
+                changed = set(results) | set(discovery)
+            if changed:
+                recheck(changed, results, analyze, discovery, out)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
@@ -1,13 +1,116 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
+import atexit
+import json
+import multiprocessing
 import os
+import threading
 from werkzeug.utils import secure_filename
-from main import load_config
+from main import load_config, __version__
+from cache import ResultCache, WarmCache
 from enhanced_analysis import EnhancedCodeSage
-from improved_reporting import generate_detailed_report
-from parallel_processing import analyze_files_parallel
+from improved_reporting import generate_stream
+from parallel_processing import analyze_sources_parallel, AnalysisPool, CachedPool, PoolBusyError
+from jobs import JobQueue, JobQueueFull, describe_error
 
 app = Flask(__name__)
 
+# Jobs analyzed at once, jobs allowed to wait or run, and how long
+# finished jobs are kept, in seconds
+JOB_WORKERS = 2
+MAX_JOBS = 16
+JOB_TTL = 600
+# Seconds between keep-alive comments on an idle event stream
+EVENT_KEEPALIVE = 15
+# Results of up to this many distinct uploaded files, and this many bytes
+# of them as JSON, are kept in memory. When CODESAGE_UPLOAD_CACHE names a
+# directory, results are also stored there and shared with other server
+# processes using it.
+UPLOAD_CACHE_ENTRIES = 10000
+UPLOAD_CACHE_BYTES = 64 * 1024 * 1024
+UPLOAD_CACHE_DIR = os.environ.get('CODESAGE_UPLOAD_CACHE')
+
+_analysis_pool = None
+_analysis_pool_lock = threading.Lock()
+# The process that started _analysis_pool; a forked child has to start its own
+_analysis_pool_pid = None
+_job_queue = None
+_upload_cache = None
+
+def get_analysis_pool():
+    """Return the shared worker pool, starting it if this process has none.
+
+    Uploads whose content was analyzed before are answered from the
+    upload cache without reaching the workers.
+    """
+    global _analysis_pool, _analysis_pool_pid, _job_queue, _upload_cache
+    with _analysis_pool_lock:
+        if _analysis_pool is None or _analysis_pool_pid != os.getpid():
+            config = load_config('config.yaml')
+            disk = None
+            if UPLOAD_CACHE_DIR:
+                disk = ResultCache(UPLOAD_CACHE_DIR)
+                disk.prune()
+            _upload_cache = WarmCache(disk, max_entries=UPLOAD_CACHE_ENTRIES, max_bytes=UPLOAD_CACHE_BYTES)
+            # Uploads run EnhancedCodeSage's rules, so keys name it apart
+            # from the CLI's cache entries for the same config
+            namespace = f"{__version__}:{EnhancedCodeSage.__name__}:{config.fingerprint}"
+            _analysis_pool = CachedPool(AnalysisPool(config), _upload_cache, namespace=namespace)
+            _analysis_pool_pid = os.getpid()
+            _job_queue = None
+        return _analysis_pool
+
+def get_job_queue():
+    """Return the job queue that runs on the shared pool, starting it on first use."""
+    global _job_queue
+    pool = get_analysis_pool()
+    with _analysis_pool_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(pool, JOB_WORKERS, MAX_JOBS, JOB_TTL)
+        return _job_queue
+
+def _forget_parent_pool():
+    """In a forked child, drop the parent's pool instead of sharing it.
+
+    The parent's workers are not the child's processes, so they are also
+    removed from multiprocessing's children, which would otherwise
+    terminate them when the child exits.
+    """
+    global _analysis_pool, _job_queue, _upload_cache, _analysis_pool_lock
+    if _analysis_pool is None:
+        return
+    _analysis_pool = _job_queue = _upload_cache = None
+    _analysis_pool_lock = threading.Lock()
+    multiprocessing.process._children.clear()
+
+os.register_at_fork(after_in_child=_forget_parent_pool)
+
+@atexit.register
+def _shutdown():
+    """Let running jobs finish, then stop the workers of this process's pool."""
+    if _analysis_pool is None or _analysis_pool_pid != os.getpid():
+        return
+    if _job_queue is not None:
+        _job_queue.shutdown()
+    _analysis_pool.shutdown()
+
+def read_uploads():
+    """The uploaded Python files as ``(filename, bytes)`` pairs."""
+    sources = []
+    seen = set()
+    for file in request.files.getlist('file'):
+        if file.filename == '':
+            continue
+        if file and file.filename.endswith('.py'):
+            filename = secure_filename(file.filename)
+            # Keep same-named uploads apart in the results
+            name, suffix = filename, 2
+            while name in seen:
+                name = f"{filename} ({suffix})"
+                suffix += 1
+            seen.add(name)
+            sources.append((name, file.read()))
+    return sources
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -17,35 +120,101 @@ def analyze():
     if 'file' not in request.files:
         return jsonify({'error': 'No file part'})
     
-    files = request.files.getlist('file')
-    file_paths = []
-    for file in files:
-        if file.filename == '':
-            continue
-        if file and file.filename.endswith('.py'):
-            filename = secure_filename(file.filename)
-            file_path = os.path.join('uploads', filename)
-            file.save(file_path)
-            file_paths.append(file_path)
+    sources = read_uploads()
+    if not sources:
+        return jsonify({'error': 'No valid Python files uploaded'})
+
+    pool = get_analysis_pool()
+    try:
+        results = analyze_sources_parallel(sources, None, pool=pool)
+    except PoolBusyError:
+        return jsonify({'error': 'Server is busy, please retry shortly'}), 503
+
+    # Stream the detailed report as it renders
+    return Response(generate_stream(results), mimetype='text/html')
+
+@app.route('/cache')
+def cache_stats():
+    """Size and hit/miss counts of the upload cache."""
+    get_analysis_pool()
+    return jsonify({'entries': len(_upload_cache), 'max_entries': _upload_cache.max_entries,
+                    'bytes': _upload_cache.bytes, 'max_bytes': _upload_cache.max_bytes,
+                    'hits': _upload_cache.hits, 'misses': _upload_cache.misses,
+                    'disk': UPLOAD_CACHE_DIR})
 
-    if not file_paths:
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Start analyzing the uploaded files and return the job's id at once."""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'})
+
+    sources = read_uploads()
+    if not sources:
         return jsonify({'error': 'No valid Python files uploaded'})
 
-    config = load_config('config.yaml')
-    results = analyze_files_parallel(file_paths, config)
+    try:
+        job = get_job_queue().submit(sources)
+    except JobQueueFull:
+        return jsonify({'error': 'Server is busy, please retry shortly'}), 503
+    return jsonify({'id': job.id, 'status': job.status, 'files': len(sources),
+                    'url': f'/jobs/{job.id}', 'events': f'/jobs/{job.id}/events'}), 202
+
+def _find_job(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return None, (jsonify({'error': 'Unknown or expired job'}), 404)
+    return job, None
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job, error = _find_job(job_id)
+    if error:
+        return error
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/report')
+def job_report(job_id):
+    job, error = _find_job(job_id)
+    if error:
+        return error
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 409
+    return Response(generate_stream(job.results), mimetype='text/html')
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
 
-    # Generate detailed report
-    report = generate_detailed_report(results)
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-Sent Events: a ``file`` event per analyzed file, or ``failed``
+    if its analysis raised, then ``end``."""
+    job, error = _find_job(job_id)
+    if error:
+        return error
 
-    # Clean up uploaded files
-    for file_path in file_paths:
-        try:
-            os.remove(file_path)
-        except PermissionError:
-            print(f"Could not delete {file_path}. It will be deleted later.")
+    def stream():
+        for item in job.events(timeout=EVENT_KEEPALIVE):
+            if item is None:
+                yield ": keep-alive\n\n"
+                continue
+            filename, result = item
+            if isinstance(result, Exception):
+                yield _event('failed', {'file': filename, 'error': describe_error(result)})
+            else:
+                yield _event('file', {'file': filename, 'issues': result.to_dicts()})
+        yield _event('end', job.to_dict(include_results=False))
 
-    return report
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 if __name__ == '__main__':
-    os.makedirs('uploads', exist_ok=True)
-    app.run(debug=True)
\ No newline at end of file
+    # Start the pool before serving; with the debug reloader only the
+    # child process that actually handles requests needs one.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        get_analysis_pool()
+    app.run(debug=True)
+elif os.environ.get('CODESAGE_LAZY_POOL') != '1':
+    # A WSGI server imports the app; start the workers now rather than
+    # on the first request. Workers forked from a preloading server
+    # start their own pool when first used.
+    get_analysis_pool()
\ No newline at end of file
@@ -0,0 +1,28 @@
+import os
+import tempfile
+import unittest
+from benchmarks.corpus import generate_corpus
+from benchmarks.run import find_regressions
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_corpus_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first = generate_corpus(os.path.join(tmp, 'a'), 'deep_nesting', scale=0.1)
+            second = generate_corpus(os.path.join(tmp, 'b'), 'deep_nesting', scale=0.1)
+            for left, right in zip(first, second):
+                with open(left) as f1, open(right) as f2:
+                    self.assertEqual(f1.read(), f2.read())
+
+    def test_regression_gate(self):
+        history = [{'scale': 1.0, 'results': {'giant/x': {'lines_per_second': rate}}}
+                   for rate in (100.0, 110.0, 90.0)]
+        slow = {'giant/x': {'seconds': 1.0, 'lines_per_second': 80.0}}
+        fine = {'giant/x': {'seconds': 1.0, 'lines_per_second': 95.0}}
+        self.assertEqual(find_regressions(slow, history, 1.0, threshold=0.1),
+                         [('giant/x', 80.0, 100.0)])
+        self.assertEqual(find_regressions(fine, history, 1.0, threshold=0.1), [])
+        self.assertEqual(find_regressions(slow, history, 2.0, threshold=0.1), [])
+
+if __name__ == '__main__':
+    unittest.main()
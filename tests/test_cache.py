@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from src.cache import ResultCache, WarmCache
+
+ISSUES = [{"type": "line_length", "message": "Line is too long (90 > 79 characters)", "line": 3}]
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        cache = ResultCache(self.directory, namespace='v1')
+        key = cache.key(b"x = 1\n")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, ISSUES)
+        self.assertEqual(cache.get(key), ISSUES)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_namespace_changes_key(self):
+        content = b"x = 1\n"
+        self.assertNotEqual(ResultCache(self.directory, namespace='a').key(content),
+                            ResultCache(self.directory, namespace='b').key(content))
+
+    def test_prune_by_age_and_size(self):
+        cache = ResultCache(self.directory, max_bytes=None, max_age=60)
+        old_key, new_key = cache.key(b"old"), cache.key(b"new")
+        cache.put(old_key, ISSUES)
+        cache.put(new_key, ISSUES)
+        old_path = cache._entry_path(old_key)
+        os.utime(old_path, (time.time() - 120, time.time() - 120))
+        cache.prune()
+        self.assertIsNone(cache.get(old_key))
+        self.assertEqual(cache.get(new_key), ISSUES)
+
+        cache.max_bytes = 0
+        cache.prune()
+        self.assertIsNone(cache.get(new_key))
+
+    def test_warm_cache_counts_every_lookup_across_threads(self):
+        cache = WarmCache(ResultCache(self.directory), max_entries=2)
+        cache.put('a', ISSUES)
+
+        def look_up():
+            for key in ['a', 'b', 'c'] * 200:
+                cache.get(key)
+
+        threads = [threading.Thread(target=look_up) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((cache.hits, cache.misses), (1600, 3200))
+
+    def test_warm_cache_is_bounded_by_bytes(self):
+        size = len(json.dumps(ISSUES))
+        cache = WarmCache(max_bytes=2 * size)
+        for key in 'abc':
+            cache.put(key, ISSUES)
+        self.assertEqual((len(cache), cache.bytes), (2, 2 * size))
+        self.assertIsNone(cache.get('a'))
+        # Replacing an entry does not count it twice
+        cache.put('c', ISSUES)
+        self.assertEqual(cache.bytes, 2 * size)
+        # An entry larger than the whole budget is not kept
+        cache.put('d', ISSUES * 3)
+        self.assertEqual((len(cache), cache.bytes), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
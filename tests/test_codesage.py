@@ -72,5 +72,18 @@ def complex_function(n):
         self.assertEqual(len(self.sage.issues), 1)
         self.assertTrue("is too complex" in self.sage.issues[0]['message'])
 
+    def test_analyze_source_accepts_bytes(self):
+        code = "# -*- coding: latin-1 -*-\nname = 'caf\xe9'\nbadName = 1\n".encode('latin-1')
+        issues = self.sage.analyze_source(code, 'upload.py')
+        self.assertTrue(any(issue['type'] == 'variable_naming' and issue['line'] == 3 for issue in issues))
+
+    def test_analyze_source_keeps_no_state_between_files(self):
+        first = self.sage.analyze_source("badName = 1\n", 'first.py')
+        second = self.sage.analyze_source("otherName = 2\n", 'second.py')
+        self.assertEqual(second.path, 'second.py')
+        self.assertFalse(any("badName" in issue['message'] for issue in second))
+        self.assertEqual(len(first), len(self.sage.analyze_source("badName = 1\n", 'first.py')))
+        self.assertEqual(self.sage.issues, [])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,111 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src import config as config_module
+from src.config import Config, ConfigError, ConfigResolver, load_config
+from src.main import config_fingerprint
+
+
+class TestConfig(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'config.yaml')
+        self.write("max_line_length: 100\nexclude:\n  - build/\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, content):
+        with open(self.path, 'w') as f:
+            f.write(content)
+
+    def test_loaded_once_and_immutable(self):
+        config = load_config(self.path)
+        self.assertIs(load_config(self.path), config)
+        self.assertEqual(config.get('max_line_length'), 100)
+        self.assertEqual(config['exclude'], ('build/',))
+        with self.assertRaises(TypeError):
+            config['max_line_length'] = 80
+        self.assertEqual(config.fingerprint, config_fingerprint({"max_line_length": 100, "exclude": ["build/"]}))
+        self.assertEqual(pickle.loads(pickle.dumps(config)), config)
+
+        self.write("max_line_length: 120\n")
+        os.utime(self.path, ns=(0, 0))
+        changed = load_config(self.path)
+        self.assertEqual(changed.get('max_line_length'), 120)
+        self.assertNotEqual(changed.fingerprint, config.fingerprint)
+
+    def test_invalid_values_are_rejected(self):
+        for values in ({'max_line_length': '80'}, {'check_docstrings': 'yes'}, {'max_complexity': True},
+                       {'line_length_tab_size': True}, {'min_test_coverage': False}):
+            with self.assertRaises(ConfigError):
+                Config(values)
+        self.write("- not\n- a mapping\n")
+        with self.assertRaises(ConfigError):
+            Config.load(self.path)
+        self.assertEqual(len(Config(None)), 0)
+        self.assertIsNone(Config({'line_length_tab_size': None})['line_length_tab_size'])
+        self.assertIs(Config({'check_docstrings': False})['check_docstrings'], False)
+
+    def test_nested_configs_resolve_once_per_directory(self):
+        os.makedirs(os.path.join(self.root, 'svc', 'legacy', 'deep'))
+        with open(os.path.join(self.root, 'svc', 'config.yaml'), 'w') as f:
+            f.write("max_line_length: 120\nmax_complexity: 5\n")
+        with open(os.path.join(self.root, 'svc', 'legacy', 'pyproject.toml'), 'w') as f:
+            f.write("[tool.codesage]\nmax_line_length = 200\n")
+        resolver = ConfigResolver(load_config(self.path), self.root)
+
+        with mock.patch.object(config_module, 'directory_overrides',
+                               wraps=config_module.directory_overrides) as overrides:
+            deep = resolver.config_for(os.path.join(self.root, 'svc', 'legacy', 'deep', 'a.py'))
+            resolver.config_for(os.path.join(self.root, 'svc', 'legacy', 'deep', 'b.py'))
+            svc = resolver.config_for(os.path.join(self.root, 'svc', 'c.py'))
+            top = resolver.config_for(os.path.join(self.root, 'd.py'))
+        # The base file's directory is the top; its files are not read
+        self.assertEqual(overrides.call_count, 3)
+
+        self.assertIs(top, resolver.base)
+        self.assertEqual((svc['max_line_length'], svc['max_complexity']), (120, 5))
+        self.assertEqual((deep['max_line_length'], deep['max_complexity']), (200, 5))
+        self.assertEqual(deep['exclude'], ('build/',))
+
+    def test_parent_configs_apply_below_the_analyzed_path(self):
+        os.makedirs(os.path.join(self.root, 'pkg', 'sub'))
+        with open(os.path.join(self.root, 'pkg', 'config.yaml'), 'w') as f:
+            f.write("max_complexity: 5\n")
+        file_path = os.path.join(self.root, 'pkg', 'sub', 'a.py')
+        whole = ConfigResolver(load_config(self.path), self.root).config_for(file_path)
+        for start in (os.path.join(self.root, 'pkg', 'sub'), file_path):
+            self.assertEqual(ConfigResolver(load_config(self.path), start).config_for(file_path).fingerprint,
+                             whole.fingerprint)
+        self.assertEqual(whole['max_complexity'], 5)
+
+        # Without a base file, lookups stop at the repository root
+        os.mkdir(os.path.join(self.root, '.git'))
+        resolver = ConfigResolver({'max_line_length': 90}, os.path.join(self.root, 'pkg', 'sub'))
+        config = resolver.config_for(file_path)
+        self.assertEqual((config['max_line_length'], config['max_complexity']), (100, 5))
+
+        # A base file given explicitly wins over the files beside it and
+        # at the repository root, and nested files still apply below
+        strict = os.path.join(self.root, 'strict.yaml')
+        with open(strict, 'w') as f:
+            f.write("max_line_length: 90\nmax_complexity: 1\n")
+        outside = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, outside)
+        custom = os.path.join(outside, 'custom.yaml')
+        with open(custom, 'w') as f:
+            f.write("max_line_length: 80\n")
+        for base, expected in ((strict, (90, 1)), (custom, (80, None))):
+            resolver = ConfigResolver(load_config(base), self.root)
+            top = resolver.config_for(os.path.join(self.root, 'a.py'))
+            self.assertEqual((top['max_line_length'], top.get('max_complexity')), expected)
+            nested = resolver.config_for(file_path)
+            self.assertEqual((nested['max_line_length'], nested['max_complexity']), (expected[0], 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
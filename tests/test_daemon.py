@@ -0,0 +1,83 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from src.client import DaemonError, send_request
+from src.daemon import AnalysisDaemon, DaemonServer
+from src.main import CodeSage, analyze_paths, format_results
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.config = os.path.join(self.root, 'config.yaml')
+        with open(self.config, 'w') as f:
+            f.write("max_function_length: 50\n")
+        os.mkdir(os.path.join(self.root, 'pkg'))
+        with open(os.path.join(self.root, 'pkg', 'mod.py'), 'w') as f:
+            f.write("def f():\n    return 1\n")
+        self.daemon = AnalysisDaemon(os.path.join(self.root, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def request(self, **extra):
+        request = {"command": "analyze", "paths": ["pkg"], "cwd": self.root, "config": "config.yaml"}
+        request.update(extra)
+        return self.daemon.handle(request)
+
+    def test_output_matches_cli(self):
+        path = os.path.join(self.root, 'pkg', 'mod.py')
+        results = analyze_paths(CodeSage({"max_function_length": 50}), [path])
+        expected = format_results({os.path.join('pkg', 'mod.py'): results[path]}, 'text')
+        self.assertEqual(self.request(), {"output": expected})
+        # Served from the warm cache the second time
+        self.assertEqual(self.request(), {"output": expected})
+        self.assertEqual((self.daemon.cache.hits, self.daemon.cache.misses), (1, 1))
+
+    def test_errors_are_reported(self):
+        self.assertIn('error', self.request(config='missing.yaml'))
+        self.assertIn('error', self.daemon.handle({"command": "bogus"}))
+        self.assertIn('error', self.daemon.handle({"command": "analyze", "cwd": self.root}))
+        self.assertIn('error', self.daemon.handle(["not", "an", "object"]))
+        # Unexpected failures are answered too
+        self.daemon.analyze = lambda request: {}[request]
+        self.assertEqual(self.request(), {"error": "TypeError: unhashable type: 'dict'"})
+
+    def test_client_rejects_empty_reply(self):
+        socket_path = os.path.join(self.root, 'silent.sock')
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(socket_path)
+            listener.listen(1)
+
+            def hang_up():
+                connection, _ = listener.accept()
+                connection.recv(65536)
+                connection.close()
+
+            thread = threading.Thread(target=hang_up)
+            thread.start()
+            with self.assertRaises(DaemonError):
+                send_request({"command": "status"}, socket_path, timeout=10)
+            thread.join(10)
+
+    def test_socket_round_trip(self):
+        socket_path = os.path.join(self.root, 'daemon.sock')
+        server = DaemonServer(socket_path, self.daemon)
+        thread = threading.Thread(target=server.serve)
+        thread.start()
+        try:
+            response = send_request({"command": "analyze", "paths": ["pkg"], "cwd": self.root,
+                                     "config": "config.yaml", "format": "json"}, socket_path, timeout=10)
+            self.assertIn('"pkg/mod.py"', response['output'])
+            send_request({"command": "shutdown"}, socket_path, timeout=10)
+        finally:
+            thread.join(10)
+            server.server_close()
+        self.assertFalse(os.path.exists(socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
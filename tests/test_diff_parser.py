@@ -0,0 +1,74 @@
+import unittest
+from src.diff_parser import ChangedLines, parse_unified_diff
+from src.enhanced_analysis import EnhancedCodeSage
+
+DIFF = """diff --git a/pkg/mod.py b/pkg/mod.py
+index 1111111..2222222 100644
+--- a/pkg/mod.py
++++ b/pkg/mod.py
+@@ -3,0 +4,2 @@ def a():
++    x = 1
++    y = 2
+@@ -10 +12 @@ def b():
+-    return 0
++    return 1
+@@ -20,2 +21,0 @@ def c():
+-    pass
+-    pass
+diff --git a/gone.py b/gone.py
+deleted file mode 100644
+--- a/gone.py
++++ /dev/null
+@@ -1 +0,0 @@
+-x = 1
+"""
+
+SOURCE = """def touched():
+    BadName = 1
+    return BadName
+
+def untouched():
+    OtherName = 2
+    return OtherName
+"""
+
+
+class TestDiffParser(unittest.TestCase):
+    def test_parse_added_lines(self):
+        changed = parse_unified_diff(DIFF)
+        self.assertEqual(list(changed), ['pkg/mod.py'])
+        self.assertEqual(list(changed['pkg/mod.py']), [4, 5, 12])
+
+    def test_form_feed_does_not_split_a_line(self):
+        diff = "+++ b/mod.py\r\n@@ -1,0 +2,3 @@\r\n+a = 1\r\n+\x0c\r\n+b = 2\r\n@@ -5 +7 @@\n-x\n+y\u2028z\n"
+        self.assertEqual(list(parse_unified_diff(diff)['mod.py']), [2, 3, 4, 7])
+
+    def test_overlaps(self):
+        lines = ChangedLines([(4, 5), (12, 12)])
+        self.assertTrue(lines.overlaps(1, 4))
+        self.assertTrue(lines.overlaps(10, 20))
+        self.assertFalse(lines.overlaps(6, 11))
+        self.assertNotIn(6, lines)
+
+    def test_changed_lines_limit_reported_issues(self):
+        sage = EnhancedCodeSage({})
+        issues = sage.analyze_source(SOURCE, 'mod.py', ChangedLines([(2, 2)]))
+        reported = {(issue['type'], issue['line']) for issue in issues}
+        self.assertIn(('variable_naming', 2), reported)
+        self.assertIn(('missing_docstring', 1), reported)
+        self.assertNotIn(('variable_naming', 3), reported)
+        self.assertFalse(any(line >= 5 for _, line in reported))
+
+    def test_touched_definition_does_not_keep_module_issues(self):
+        sage = EnhancedCodeSage({'max_function_length': 1})
+        issues = sage.analyze_source(SOURCE, 'mod.py', ChangedLines([(2, 2)]))
+        messages = [issue['message'] for issue in issues if issue['line'] == 1]
+        self.assertIn("Function 'touched' is missing a docstring.", messages)
+        self.assertIn("Function 'touched' is too long (2 lines). Consider breaking it down.", messages)
+        self.assertNotIn("Module 'module' is missing a docstring.", messages)
+        # A change to the first line still reports the module
+        issues = sage.analyze_source(SOURCE, 'mod.py', ChangedLines([(1, 1)]))
+        self.assertIn("Module 'module' is missing a docstring.", [issue['message'] for issue in issues])
+
+if __name__ == '__main__':
+    unittest.main()
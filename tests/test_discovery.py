@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+from src.discovery import iter_python_files
+
+
+class TestDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for path in ['app/main.py', 'app/notes.txt', 'app/generated/big.py', 'app/keep.py',
+                     'venv/lib/site.py', 'node_modules/pkg/x.py', '.git/hooks/h.py',
+                     'pkg/__pycache__/m.py', 'scripts/tool.py', 'scripts/skip_me.py']:
+            full = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, 'w') as f:
+                f.write('x = 1\n')
+        with open(os.path.join(self.root, '.gitignore'), 'w') as f:
+            f.write('# build output\ngenerated/\n*.py\n!app/*.py\n!scripts/*.py\n')
+        with open(os.path.join(self.root, 'scripts', '.gitignore'), 'w') as f:
+            f.write('skip_*.py\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def relative(self, paths):
+        return [os.path.relpath(path, self.root).replace(os.sep, '/') for path in paths]
+
+    def test_prunes_ignored_directories_and_files(self):
+        found = self.relative(iter_python_files(self.root))
+        self.assertEqual(found, ['app/keep.py', 'app/main.py', 'scripts/tool.py'])
+
+    def test_config_excludes(self):
+        found = self.relative(iter_python_files(self.root, excludes=['app/main.py'],
+                                                use_gitignore=False))
+        self.assertIn('app/generated/big.py', found)
+        self.assertNotIn('app/main.py', found)
+        self.assertNotIn('venv/lib/site.py', found)
+
+    def test_single_file(self):
+        path = os.path.join(self.root, 'app', 'main.py')
+        self.assertEqual(list(iter_python_files(path)), [path])
+
+if __name__ == '__main__':
+    unittest.main()
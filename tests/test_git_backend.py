@@ -0,0 +1,81 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from src.git_backend import GitError, GitRepository
+from src.git_integration import analyze_changes
+
+
+class TestGitBackend(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.git("init", "--quiet")
+        self.commit({'keep.py': '"""Keep."""\n', 'old_name.py': '"""Moved."""\nX = 1\n',
+                     'gone.py': 'x = 1\n'})
+        self.base = self.git("rev-parse", "HEAD")
+        os.remove(os.path.join(self.root, 'gone.py'))
+        self.git("mv", "old_name.py", "new_name.py")
+        self.commit({'keep.py': '"""Keep."""\n\ndef Added():\n    BadName = 1\n    return BadName\n',
+                     'notes.txt': 'not python\n'})
+        self.head = self.git("rev-parse", "HEAD")
+        # The work tree no longer matches head; analysis must not read it
+        with open(os.path.join(self.root, 'keep.py'), 'w') as f:
+            f.write('syntax error (\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def git(self, *args):
+        result = subprocess.run(["git", "-C", self.root, "-c", "user.name=Test",
+                                 "-c", "user.email=test@example.com", *args],
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+
+    def commit(self, files):
+        for name, content in files.items():
+            with open(os.path.join(self.root, name), 'w') as f:
+                f.write(content)
+        self.git("add", "-A")
+        self.git("commit", "--quiet", "-m", "commit")
+
+    def test_changed_files_are_read_from_objects(self):
+        with GitRepository(self.root) as repo:
+            changed = repo.changed_files(self.base, self.head)
+            self.assertEqual(sorted(changed), ['keep.py', 'new_name.py'])
+            self.assertEqual(repo.read_blob(changed['keep.py']),
+                             b'"""Keep."""\n\ndef Added():\n    BadName = 1\n    return BadName\n')
+            self.assertEqual(repo.resolve('HEAD'), self.head)
+            with self.assertRaises(GitError):
+                repo.resolve('no-such-branch')
+
+    def test_analyze_changes_without_checkout(self):
+        cwd = os.getcwd()
+        results = analyze_changes(self.root, self.base, self.head, {'check_docstrings': True},
+                                  changed_lines_only=True)
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertEqual(list(results), ['keep.py'])
+        self.assertEqual([(issue['type'], issue['line']) for issue in results['keep.py']],
+                         [('variable_naming', 4), ('variable_naming', 5), ('missing_docstring', 3)])
+
+    def test_changed_lines_ignore_user_diff_settings(self):
+        for key, value in (('diff.noprefix', 'true'), ('diff.mnemonicPrefix', 'true'),
+                           ('core.quotepath', 'true')):
+            self.git("config", key, value)
+        names = ['módulo.py', 'tab\tname.py', 'quote"d.py']
+        for name in names:
+            with open(os.path.join(self.root, name), 'w') as f:
+                f.write('"""Doc."""\nBadName = 1\n')
+        self.git("add", "--", *names)
+        self.git("commit", "--quiet", "-m", "names git quotes")
+        head = self.git("rev-parse", "HEAD")
+        with GitRepository(self.root) as repo:
+            lines = repo.changed_lines(self.head, head)
+            self.assertEqual(sorted(lines), sorted(names))
+            self.assertEqual(list(lines['módulo.py']), [1, 2])
+        results = analyze_changes(self.root, self.head, head, {}, changed_lines_only=True)
+        self.assertEqual(sorted(results), sorted(names))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules on the analysis path and what they must not pull in at import time.
+HEAVY_MODULES = ('flask', 'jinja2', 'github', 'yaml', 'mccabe', 'multiprocessing')
+CORE_MODULES = ('src.main', 'src.enhanced_analysis', 'src.git_integration', 'src.improved_reporting')
+
+# Cumulative import time allowed for each core module, in microseconds.
+IMPORT_BUDGET_US = 100000
+
+
+def import_times(module):
+    """Return ``{name: cumulative_us}`` from ``python -X importtime``."""
+    command = [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+    # The first run may have to write bytecode; measure the second
+    subprocess.run(command, cwd=ROOT, capture_output=True, check=True)
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_core_modules_stay_light(self):
+        for module in CORE_MODULES:
+            with self.subTest(module=module):
+                times = import_times(module)
+                heavy = sorted(name for name in times if name.split('.')[0] in HEAVY_MODULES)
+                self.assertEqual(heavy, [])
+                self.assertLess(times[module], IMPORT_BUDGET_US)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import unittest
+from src.enhanced_analysis import EnhancedCodeSage
+from src.jobs import JobQueue, JobQueueFull
+from src.parallel_processing import AnalysisPool
+
+
+class GatedPool:
+    """Hands results back one at a time, when the test allows it."""
+
+    def __init__(self):
+        self.sage = EnhancedCodeSage({})
+        self.gate = threading.Semaphore(0)
+
+    def iter_analyze_sources(self, sources, wait=False):
+        for filename, source in sources:
+            self.gate.acquire()
+            yield filename, self.sage.analyze_source(source, filename)
+
+
+class TestJobs(unittest.TestCase):
+    sources = [('a.py', b'BadName = 1\n'), ('b.py', b'def f(:\n'), ('c.py', b'x = 1\n')]
+
+    def test_job_results_match_direct_analysis(self):
+        pool = AnalysisPool({}, num_processes=1)
+        queue = JobQueue(pool, max_workers=1)
+        try:
+            job = queue.submit(self.sources)
+            streamed = [item[0] for item in job.events(timeout=5) if item]
+        finally:
+            queue.shutdown()
+            pool.shutdown()
+        sage = EnhancedCodeSage({})
+        expected = {filename: sage.analyze_source(source, filename) for filename, source in self.sources}
+        self.assertEqual(sorted(streamed), ['a.py', 'b.py', 'c.py'])
+        self.assertEqual(job.results, expected)
+        self.assertEqual(list(job.results), ['a.py', 'b.py', 'c.py'])
+        status = queue.get(job.id).to_dict()
+        self.assertEqual((status['status'], status['completed']), ('done', 3))
+        self.assertEqual(status['results']['a.py'], expected['a.py'].to_dicts())
+
+    def test_failed_file_does_not_fail_the_job(self):
+        # A busy pool is waited for: with no free slot and no wait, this
+        # pool raises PoolBusyError for the second file
+        pool = AnalysisPool({}, num_processes=1, max_pending=1, queue_timeout=0)
+        queue = JobQueue(pool, max_workers=1)
+        try:
+            # None cannot be parsed, so analysis raises in the worker
+            job = queue.submit([self.sources[0], ('broken.py', None)] + self.sources[1:])
+            events = dict(item for item in job.events(timeout=5) if item)
+        finally:
+            queue.shutdown()
+            pool.shutdown()
+        self.assertIsInstance(events['broken.py'], TypeError)
+        status = job.to_dict()
+        self.assertEqual((status['status'], status['completed']), ('done', 4))
+        self.assertEqual(list(status['results']), ['a.py', 'b.py', 'c.py'])
+        self.assertEqual(list(status['errors']), ['broken.py'])
+        self.assertTrue(status['errors']['broken.py'].startswith('TypeError: '))
+
+    def test_progress_limits_and_expiry(self):
+        pool = GatedPool()
+        queue = JobQueue(pool, max_workers=1, max_jobs=1, ttl=0)
+        job = queue.submit(self.sources)
+        with self.assertRaises(JobQueueFull):
+            queue.submit(self.sources)
+        events = job.events(timeout=5)
+        pool.gate.release()
+        self.assertEqual(next(events)[0], 'a.py')
+        self.assertEqual(job.to_dict(), {'id': job.id, 'status': 'running', 'files': 3, 'completed': 1})
+        pool.gate.release()
+        pool.gate.release()
+        self.assertEqual([filename for filename, _ in events], ['b.py', 'c.py'])
+        queue.shutdown()
+        self.assertTrue(job.finished)
+        # With a zero TTL the finished job is gone on the next lookup
+        self.assertIsNone(queue.get(job.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
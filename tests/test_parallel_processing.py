@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from src.enhanced_analysis import EnhancedCodeSage
+from src.cache import ResultCache, WarmCache
+from src.profiling import Profile
+from src.parallel_processing import (analyze_files_parallel, iter_analyze_files_parallel, schedule_batches,
+                                     AnalysisPool, CachedPool)
+
+
+class TestParallelProcessing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for index, functions in enumerate([1, 40, 3, 200, 2, 5]):
+            path = os.path.join(self.tmp.name, f"mod_{index}.py")
+            with open(path, 'w') as f:
+                for n in range(functions):
+                    f.write(f"def Function{n}(x):\n    if x:\n        return x\n\n")
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_batches_start_with_the_largest_file(self):
+        batches = schedule_batches(self.paths, num_processes=2)
+        self.assertEqual(batches[0], [self.paths[3]])
+        self.assertEqual(sorted(path for batch in batches for path in batch), sorted(self.paths))
+
+    def test_results_match_sequential_analysis(self):
+        sage = EnhancedCodeSage({})
+        expected = {path: sage.analyze_file(path) for path in self.paths}
+        results = analyze_files_parallel(self.paths, {}, num_processes=2)
+        self.assertEqual(list(results), self.paths)
+        self.assertEqual(results, expected)
+        streamed = dict(iter_analyze_files_parallel(self.paths, {}, num_processes=2))
+        self.assertEqual(streamed, expected)
+
+    def test_profile_is_filled_when_a_pool_is_given(self):
+        pool = AnalysisPool({}, num_processes=2)
+        try:
+            profile = Profile()
+            results = analyze_files_parallel(self.paths, {}, pool=pool, profile=profile)
+        finally:
+            pool.shutdown()
+        self.assertEqual(results, analyze_files_parallel(self.paths, {}, num_processes=2))
+        self.assertEqual(sorted(profile.files), sorted(self.paths))
+        self.assertEqual(profile.files[self.paths[3]][2], len(results[self.paths[3]]))
+
+    def test_cached_pool_analyzes_repeated_uploads_once(self):
+        sources = [('a.py', b'BadName = 1\n'), ('b.py', b'def f(:\n')]
+        pool = AnalysisPool({}, num_processes=1)
+        try:
+            memory = WarmCache(ResultCache(self.tmp.name), max_entries=1)
+            cached = CachedPool(pool, memory, namespace='test')
+            first = cached.analyze_sources(sources)
+            self.assertEqual(list(first), ['a.py', 'b.py'])
+            self.assertEqual((memory.hits, memory.misses, len(memory)), (0, 2, 1))
+            # Same bytes under another name; one entry comes back from disk
+            again = cached.analyze_sources([('c.py', b'BadName = 1\n')] + sources[1:])
+            self.assertEqual(again, {'c.py': first['a.py'], 'b.py': first['b.py']})
+            self.assertEqual(again['c.py'].path, 'c.py')
+            self.assertEqual((memory.hits, memory.misses), (2, 2))
+
+            # Identical uploads in one request are analyzed once
+            twins = cached.analyze_sources([('d.py', b'x = 2\n'), ('e.py', b'x = 2\n')])
+            self.assertEqual(twins['d.py'], twins['e.py'])
+            self.assertEqual((twins['d.py'].path, twins['e.py'].path), ('d.py', 'e.py'))
+            self.assertEqual(memory.misses, 3)
+        finally:
+            pool.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import ast
+from src.enhanced_analysis import EnhancedCodeSage
+from src.rules import RuleEngine, Rule, BranchComplexityRule, LineLengthRule
+from src.diff_parser import ChangedLines
+from src.results import Issue
+from src.profiling import Profile
+
+SOURCE = """
+import os
+from math import *
+
+class badClass:
+    def BadMethod(self, Items):
+        for item in Items:
+            if item:
+                def inner():
+                    while True:
+                        pass
+        return [x for x in Items if x]
+"""
+
+
+class CountingRule(Rule):
+    name = "counting"
+    node_types = (ast.Name,)
+
+    def start(self):
+        self.seen = 0
+
+    def visit(self, node, scope, issues):
+        self.seen += 1
+
+
+class TestRuleEngine(unittest.TestCase):
+    def test_single_pass_matches_individual_checks(self):
+        config = {'max_complexity': 2}
+        tree = ast.parse(SOURCE)
+        fused = EnhancedCodeSage(config).engine.run(tree, SOURCE)
+
+        sage = EnhancedCodeSage(config)
+        sage.check_function_length(tree)
+        sage.check_variable_naming(tree)
+        sage.check_import_style(tree)
+        sage.check_complexity(tree)
+        sage.check_docstrings(tree)
+        sage.check_line_length(SOURCE)
+        sage.check_function_naming(tree)
+        sage.check_class_naming(tree)
+        self.assertEqual(fused, sage.issues)
+
+    def test_nested_branches_count_toward_every_enclosing_function(self):
+        tree = ast.parse(SOURCE)
+        issues = RuleEngine([BranchComplexityRule({'max_complexity': 1})]).run(tree)
+        messages = [issue['message'] for issue in issues]
+        self.assertIn("Function 'BadMethod' is too complex (complexity: 5). Consider refactoring.", messages)
+        self.assertIn("Function 'inner' is too complex (complexity: 2). Consider refactoring.", messages)
+
+    def test_each_node_is_dispatched_once(self):
+        tree = ast.parse(SOURCE)
+        rule = CountingRule({})
+        RuleEngine([rule]).run(tree)
+        expected = sum(isinstance(node, ast.Name) for node in ast.walk(tree))
+        self.assertEqual(rule.seen, expected)
+
+    def test_issue_reads_like_the_legacy_dict(self):
+        issue = Issue('line_length', 7, 0, (90, 79))
+        expected = {"type": "line_length", "message": "Line is too long (90 > 79 characters)", "line": 7}
+        self.assertEqual(dict(issue), expected)
+        self.assertEqual(issue['message'], issue.message)
+        self.assertEqual(Issue.from_record(issue.to_record()), issue)
+
+    def test_profile_counts_nodes_and_issues_per_rule(self):
+        profile = Profile()
+        result = EnhancedCodeSage({}, profile).analyze_source(SOURCE, 'mod.py')
+        names = sum(isinstance(node, ast.Name) for node in ast.walk(ast.parse(SOURCE)))
+        seconds, nodes, issues = profile.rules['variable_naming']
+        self.assertEqual(nodes, names)
+        self.assertEqual(issues, sum(issue['type'] == 'variable_naming' for issue in result))
+        self.assertEqual(profile.files['mod.py'][2], len(result))
+
+        merged = Profile().merge(profile.to_dict()).merge(profile)
+        self.assertEqual(merged.rules['variable_naming'][1], 2 * nodes)
+
+    def test_line_length_counts_columns(self):
+        content = "x = 1\r\n" + "y" * 10 + "\r\n" + "\t" * 3 + "z\n" + "\u4e2d" * 6 + "\n" + "w" * 11
+        def long_lines(changed=None, **config):
+            rule = LineLengthRule(dict(config, max_line_length=10))
+            rule.changed = changed
+            issues = []
+            rule.check_source(content, issues)
+            return [(issue.line, issue.args[0]) for issue in issues]
+
+        self.assertEqual(long_lines(), [(5, 11)])
+        self.assertEqual(long_lines(line_length_tab_size=4), [(3, 13), (5, 11)])
+        self.assertEqual(long_lines(line_length_east_asian_width=True), [(4, 12), (5, 11)])
+        self.assertEqual(long_lines(ChangedLines([(1, 4)]), line_length_tab_size=4), [(3, 13)])
+        self.assertEqual(long_lines(ChangedLines([(3, 3), (5, 9)]), line_length_tab_size=4), [(3, 13), (5, 11)])
+        self.assertEqual(long_lines(ChangedLines([(4, 4), (7, 9)]), line_length_east_asian_width=True), [(4, 12)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import mmap
+import os
+import shutil
+import tempfile
+import unittest
+from src.enhanced_analysis import EnhancedCodeSage
+from src.main import CodeSage
+from src.source_reader import SourceText, decode_source, open_source
+
+
+class TestSourceReader(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, data):
+        path = os.path.join(self.root, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_coding_cookie_and_bom(self):
+        latin = self.write('latin.py', b'# -*- coding: latin-1 -*-\n"""Caf\xe9."""\n')
+        bom = self.write('bom.py', b'\xef\xbb\xbf"""Module."""\r\nx = 1\r\n')
+        sage = EnhancedCodeSage({})
+        self.assertEqual(sage.analyze_file(latin), [])
+        self.assertEqual(sage.analyze_file(bom), [])
+        with open_source(bom) as data:
+            self.assertEqual(decode_source(data), '"""Module."""\nx = 1\n')
+
+    def test_undecodable_file_is_reported(self):
+        path = self.write('bad.py', b'"""Module."""\nx = "\xff"\n')
+        for sage in (CodeSage({}), EnhancedCodeSage({})):
+            issues = sage.analyze_file(path)
+            self.assertEqual([(issue['type'], issue['line']) for issue in issues], [('decode_error', 2)])
+
+    def test_large_files_are_mapped(self):
+        source = b'"""Module."""\r\n' + b'x = 1  # ' + b'-' * 100 + b'\r\n'
+        path = self.write('big.py', source)
+        with open_source(path, mmap_threshold=16) as data:
+            self.assertIsInstance(data, mmap.mmap)
+            issues = EnhancedCodeSage({}).analyze_source(data, path)
+        self.assertEqual([(issue['type'], issue['line'], issue['message']) for issue in issues],
+                         [('line_length', 2, 'Line is too long (109 > 79 characters)')])
+
+    def test_text_is_decoded_lazily(self):
+        text = SourceText(b'x = 1\n')
+        self.assertIsNone(text._text)
+        CodeSage({}).engine.run(None, text)
+        self.assertIsNone(text._text)
+        self.assertEqual(text.text, 'x = 1\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.main import CodeSage, analyze_paths
+from src.store import ResultStore
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = ResultStore(os.path.join(self.root, 'results.db'))
+        self.sage = CodeSage({})
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.root)
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def run_analysis(self, paths):
+        recorder = self.store.begin_run('config', '0.0')
+        results = analyze_paths(self.sage, paths, recorder)
+        recorder.finish(results)
+        return recorder, results
+
+    def test_runs_reuse_stored_blobs_and_answer_queries(self):
+        first = self.write('a.py', '"""A."""\ndef f():\n    return 1\n')
+        second = self.write('b.py', '"""B."""\nX = 1\n')
+        recorder, results = self.run_analysis([first, second])
+        self.assertEqual((recorder.hits, recorder.misses), (0, 2))
+        first_run = recorder.run_id
+        self.assertEqual([(path, issue) for path in results for issue in results[path]],
+                         self.store.run_issues(first_run))
+
+        self.write('b.py', '"""B."""\nX = 1\nY = 2\n')
+        recorder, results = self.run_analysis([first, second])
+        self.assertEqual((recorder.hits, recorder.misses), (1, 1))
+        self.assertEqual(self.store.latest_run(), recorder.run_id)
+
+        new = self.store.new_issues(first_run)
+        self.assertEqual([(path, issue['line'], issue['type']) for path, issue in new],
+                         [(second, 3, 'variable_naming')])
+        self.assertEqual(self.store.top_rules(), [('variable_naming', 2), ('missing_docstring', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.enhanced_analysis import EnhancedCodeSage
+from src.vcs_integration import analyze_github_prs
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    """Serves the few REST endpoints batch PR analysis uses."""
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        api = f"http://127.0.0.1:{server.server_port}/repos/owner/repo"
+        parts = self.path.split('/')
+        if self.path == '/repos/owner/repo':
+            self.reply(200, {"name": "repo", "full_name": "owner/repo", "url": api,
+                             "clone_url": server.clone_url})
+        elif self.path.startswith('/repos/owner/repo/pulls/') and int(parts[-1]) in server.pulls:
+            number = int(parts[-1])
+            base, head = server.pulls[number]
+            self.reply(200, {"number": number, "url": f"{api}/pulls/{number}",
+                             "issue_url": f"{api}/issues/{number}",
+                             "base": {"ref": "main", "sha": base}, "head": {"ref": f"pr{number}", "sha": head}})
+        else:
+            self.reply(404, {"message": "Not Found"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        number = int(self.path.split('/')[-2])
+        self.server.comments.append((number, body['body']))
+        self.reply(201, {"id": len(self.server.comments), "body": body['body']})
+
+
+class TestBatchPullRequests(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.upstream = os.path.join(self.root, 'upstream')
+        self.local = os.path.join(self.root, 'local')
+        self.git(self.root, "init", "--quiet", "-b", "main", self.upstream)
+        self.commit({'shared.py': '"""Shared."""\n'})
+        base = self.git(self.upstream, "rev-parse", "HEAD")
+        # Both PRs make the same change to shared.py
+        shared = '"""Shared."""\nSharedName = 1\n'
+        pulls = {}
+        for number, name in ((1, 'a.py'), (2, 'b.py')):
+            self.git(self.upstream, "checkout", "--quiet", "-b", f"pr{number}", base)
+            self.commit({'shared.py': shared, name: f'"""{name}."""\nBad{number} = 1\n'})
+            head = self.git(self.upstream, "rev-parse", "HEAD")
+            # Only reachable from the pull ref, so the clone has to fetch it
+            self.git(self.upstream, "update-ref", f"refs/pull/{number}/head", head)
+            self.git(self.upstream, "checkout", "--quiet", "main")
+            self.git(self.upstream, "branch", "--quiet", "-D", f"pr{number}")
+            pulls[number] = (base, head)
+        self.git(self.root, "clone", "--quiet", self.upstream, self.local)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGitHub)
+        self.server.pulls = pulls
+        self.server.clone_url = self.upstream
+        self.server.comments = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.root)
+
+    def git(self, cwd, *args):
+        result = subprocess.run(["git", "-C", cwd, "-c", "user.name=Test",
+                                 "-c", "user.email=test@example.com", *args],
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+
+    def commit(self, files):
+        for name, content in files.items():
+            with open(os.path.join(self.upstream, name), 'w') as f:
+                f.write(content)
+        self.git(self.upstream, "add", "-A")
+        self.git(self.upstream, "commit", "--quiet", "-m", "commit")
+
+    def test_batch_shares_analyses_across_pull_requests(self):
+        cache = {}
+        batch = analyze_github_prs('owner', 'repo', [1, 2], 'token', self.local,
+                                   config={'check_docstrings': True}, base_url=self.base_url,
+                                   num_processes=1, cache=cache)
+        self.assertEqual(sorted(batch[1]), ['a.py', 'shared.py'])
+        self.assertEqual(sorted(batch[2]), ['b.py', 'shared.py'])
+        self.assertEqual([(issue['type'], issue['line']) for issue in batch[2]['b.py']],
+                         [('variable_naming', 2)])
+        self.assertEqual(batch[1]['shared.py'].path, 'shared.py')
+        # shared.py has the same blob in both PRs and was analyzed once
+        self.assertEqual(len(cache), 3)
+        self.assertEqual([number for number, _ in self.server.comments], [1, 2])
+        self.assertIn('shared.py:2', self.server.comments[0][1])
+
+        # A later batch with the same cache analyzes nothing again
+        again = analyze_github_prs('owner', 'repo', [2], 'token', self.local,
+                                   config={'check_docstrings': True}, base_url=self.base_url,
+                                   pool=object(), cache=cache, post_comments=False)
+        self.assertEqual(again, {2: batch[2]})
+        self.assertEqual(len(self.server.comments), 2)
+
+    def test_blobs_are_analyzed_under_their_paths(self):
+        pool = RecordingPool()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            batch = analyze_github_prs('owner', 'repo', [1, 2], 'token', self.local,
+                                       config={'check_docstrings': True}, base_url=self.base_url,
+                                       pool=pool, post_comments=False)
+        self.assertEqual(sorted(pool.filenames), ['a.py', 'b.py', 'shared.py'])
+        self.assertEqual(sorted(batch[1]), ['a.py', 'shared.py'])
+
+
+class RecordingPool:
+    """Analyzes in process and records the filenames it was given."""
+
+    def __init__(self):
+        self.sage = EnhancedCodeSage({'check_docstrings': True})
+        self.filenames = []
+
+    def analyze_sources(self, sources):
+        results = {}
+        for filename, source in sources:
+            self.filenames.append(filename)
+            results[filename] = self.sage.analyze_source(source, filename)
+        return results
+
+
+if __name__ == '__main__':
+    unittest.main()
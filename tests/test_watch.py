@@ -0,0 +1,124 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from src.config import ConfigResolver, load_config
+from src.discovery import FileDiscovery
+from src.enhanced_analysis import EnhancedCodeSage
+from src.main import ScopedAnalyzer
+from src.results import Issue
+from src.watch import ConfigChanged, InotifyWatcher, PollingWatcher, diff_issues, recheck
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.discovery = FileDiscovery(self.root)
+        self.sage = EnhancedCodeSage({})
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_diff_issues_counts_duplicates(self):
+        first = Issue('line_length', 1, 0, (90, 79))
+        second = Issue('line_length', 2, 0, (90, 79))
+        added, removed = diff_issues([first, second], [second, second, second])
+        self.assertEqual(added, [second])
+        self.assertEqual(removed, [])
+        added, removed = diff_issues([first, second], [second])
+        self.assertEqual((added, removed), ([], [second]))
+
+    def test_diff_issues_ignore_shifted_lines(self):
+        source = '"""Module."""\n\ndef f():\n    return 1\n\nBadName = 1\n'
+        old = self.sage.analyze_source(source, 'mod.py')
+        new = self.sage.analyze_source('"""Module."""\nimport os\n\n' + source[15:] + 'def g():\n    pass\n', 'mod.py')
+        added, removed = diff_issues(old, new)
+        self.assertEqual(removed, [])
+        self.assertEqual([(issue['line'], issue['message']) for issue in added],
+                         [(8, "Function 'g' is missing a docstring.")])
+
+    def test_recheck_prints_only_changes(self):
+        path = self.write('mod.py', '"""Module."""\n\ndef f():\n    return 1\n')
+        results = {path: self.sage.analyze_file(path)}
+        self.write('mod.py', '"""Module."""\n\ndef f():\n    """Doc."""\n    return 1\n\ndef g():\n    return 2\n')
+        out = io.StringIO()
+        recheck({path}, results, self.sage.analyze_file, self.discovery, out)
+        self.assertEqual(out.getvalue().splitlines(), [
+            f"Changes in {path}:",
+            "- Line 3: [missing_docstring] Function 'f' is missing a docstring.",
+            "+ Line 7: [missing_docstring] Function 'g' is missing a docstring.",
+            "",
+        ])
+
+        out = io.StringIO()
+        recheck({path}, results, self.sage.analyze_file, self.discovery, out)
+        self.assertEqual(out.getvalue(), '')
+
+    def test_recheck_drops_files_under_removed_directory(self):
+        os.mkdir(os.path.join(self.root, 'pkg'))
+        path = self.write(os.path.join('pkg', 'mod.py'), 'def f():\n    return 1\n')
+        results = {path: self.sage.analyze_file(path)}
+        shutil.rmtree(os.path.join(self.root, 'pkg'))
+        out = io.StringIO()
+        recheck({os.path.join(self.root, 'pkg')}, results, self.sage.analyze_file, self.discovery, out)
+        self.assertEqual(results, {})
+        self.assertIn("- Line 1: [missing_docstring] Function 'f' is missing a docstring.", out.getvalue())
+
+    def test_config_change_triggers_rescan(self):
+        self.write('mod.py', 'x = 1\n')
+        watcher = PollingWatcher(self.discovery, ['config.yaml'], interval=0.01)
+        self.write('config.yaml', 'max_line_length: 100\n')
+        with self.assertRaises(ConfigChanged):
+            watcher.changes(timeout=1)
+
+    def test_base_config_outside_the_tree_is_watched(self):
+        self.write('mod.py', 'x = 1\n')
+        outside = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, outside)
+        base = os.path.join(outside, 'custom.yaml')
+        with open(base, 'w') as f:
+            f.write('max_line_length: 10\n')
+        for kind in (PollingWatcher, InotifyWatcher):
+            with self.subTest(kind.__name__):
+                try:
+                    watcher = kind(self.discovery, config_paths=[base])
+                except (OSError, AttributeError):
+                    continue
+                if kind is PollingWatcher:
+                    watcher.interval = 0.01
+                try:
+                    # Other files beside the base config are not reported
+                    with open(os.path.join(outside, 'other.py'), 'w') as f:
+                        f.write(f'# {kind.__name__}\n')
+                    self.assertEqual(watcher.changes(timeout=0.1), set())
+                    with open(base, 'a') as f:
+                        f.write('max_complexity: 5\n')
+                    with self.assertRaises(ConfigChanged):
+                        watcher.changes(timeout=1)
+                finally:
+                    watcher.close()
+
+    def test_reloaded_config_is_used_for_the_rescan(self):
+        config_path = self.write('config.yaml', 'max_function_length: 1\n')
+        path = self.write('mod.py', '"""Module."""\ndef f():\n    """Doc."""\n    return 1\n')
+        sage = ScopedAnalyzer(ConfigResolver(load_config(config_path), self.root))
+        results = {path: sage.analyze_file(path)}
+        self.assertEqual([issue['type'] for issue in results[path]], ['function_length'])
+        # A different size, so the cached parse is not reused
+        self.write('config.yaml', 'max_function_length: 50\n')
+        sage.use(sage.resolver.reloaded())
+        out = io.StringIO()
+        recheck({path}, results, sage.analyze_file, self.discovery, out)
+        self.assertIn('- Line 2: [function_length]', out.getvalue())
+        self.assertEqual(list(results[path]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()